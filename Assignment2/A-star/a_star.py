@@ -1,29 +1,141 @@
+import heapq
+import itertools
+import math
+import time
+
+def distance(cell1, cell2, connectivity = "4N"):
+    """
+    Distance between two cells when every move has weight 1
+
+    Args:
+        cell1(Cell): first cell
+        cell2(Cell): second cell
+        connectivity(str): connectivity of the map, either "4N" or "8N"
+
+    Return:
+        distance(float): manhatten distance between cell1 and cell2 on 4N maps,
+        octile distance on 8N maps
+    """
+
+    drow = abs(cell1.row - cell2.row)
+    dcol = abs(cell1.col - cell2.col)
+    if connectivity == "8N":
+        return max(drow, dcol) + (math.sqrt(2) - 1) * min(drow, dcol)
+    return drow + dcol
+
+class SearchStats(object):
+    """
+    Counters and timings of a search, updated while it runs
+
+    Attributes:
+        expansions(int): cells taken from the open set and expanded
+        relaxations(int): moves that lowered the g score of a cell
+        reopenings(int): relaxations of cells that were already in the open set,
+            i.e. cells pushed again because a cheaper path to them was found
+        heuristic_evals(int): calls of the heuristic
+        stale_pops(int): outdated heap entries skipped when popping
+        peak_open(int): largest number of cells in the open set at once
+        pop_time(float): seconds spent taking cells from the open set
+        expand_time(float): seconds spent generating and relaxing successors
+        path_time(float): seconds spent reconstructing the path
+    """
+
+    def __init__(self):
+        self.expansions = 0
+        self.relaxations = 0
+        self.reopenings = 0
+        self.heuristic_evals = 0
+        self.stale_pops = 0
+        self.peak_open = 0
+        self.pop_time = 0.0
+        self.expand_time = 0.0
+        self.path_time = 0.0
+
+    def total_time(self):
+        """
+        Gets time spent in all phases of the search
+
+        Return:
+            total_time(float): seconds
+        """
+
+        return self.pop_time + self.expand_time + self.path_time
+
+    def as_dict(self):
+        """
+        Gets all counters and timings, e.g. for logging as JSON
+
+        Return:
+            stats(dict): attribute names mapped to values
+        """
+
+        stats = dict(vars(self))
+        stats["total_time"] = self.total_time()
+        return stats
+
+    def summary(self):
+        """
+        Gets a human readable summary
+
+        Return:
+            lines(list[str]): one line per group of statistics
+        """
+
+        return [
+            f"expanded {self.expansions}  peak open {self.peak_open}",
+            f"relaxed {self.relaxations}  reopened {self.reopenings}",
+            f"h evals {self.heuristic_evals}  stale pops {self.stale_pops}",
+            f"pop {self.pop_time * 1000:.1f}ms  expand {self.expand_time * 1000:.1f}ms  path {self.path_time * 1000:.1f}ms"
+        ]
+
 class AStar(object):
     """
     A* object containing methods for performing the A* algorithm on a gridmap
     """
 
-    def __init__(self, map_obj):
+    def __init__(self, map_obj, heuristic = None, on_expand = None):
         """
         Initialize A*
 
         Args:
             map_obj (MapObj): map consisting of a grid of cells
                 This map is augmnented during the course of the A* algorithm.
+            heuristic(function): admissible heuristic h(cell1, cell2)
+                If None, manhatten distance (octile distance on 8N maps) is used.
+                E.g. Landmarks.cell_h for the ALT heuristic.
+            on_expand(function): optional hook on_expand(cell, stats) called
+                each time a cell is expanded, with the SearchStats so far
+
+        Counters and timings of the search are kept in self.stats.
         """
 
         self.map_obj = map_obj
+        if heuristic is not None:
+            self._h = heuristic
+        self.on_expand = on_expand
+        self.stats = SearchStats()
 
+        # The open set is a binary heap of (f, h, count, cell) entries.
+        # Instead of decrease-key, an improved cell is pushed again and the
+        # stale entry is skipped when popped (lazy deletion). self.open_pos
+        # holds the grid positions currently in the open set, so membership
+        # checks are O(1).
         self.open = []
+        self.open_pos = set()
         self.closed = []
         self.path = []
 
+        # Tie breaker making the heap FIFO among entries with equal f and h
+        self._counter = itertools.count()
+
         # Add start node into open list
         start_cell = self.map_obj.get_start_cell()
         start_cell.f = 0
         start_cell.g = 0
         start_cell.h = self._h(start_cell, self.map_obj.get_goal_cell())
-        self.open.append(self.map_obj.get_start_cell())
+        self.stats.heuristic_evals += 1
+        self._push(start_cell)
+        self.stats.peak_open = len(self.open_pos)
 
     def update(self):
         """
@@ -51,54 +163,120 @@ class AStar(object):
         
         """
 
-        if len(self.open):
-            current_cell = self.open[0]
-            current_index = 0
-            for i, cell in enumerate(self.open):
-                if cell.f < current_cell.f:
-                    current_cell = cell
-                    current_index = i
+        stats = self.stats
+        phase_start = time.perf_counter()
+        current_cell = self._pop()
+        now = time.perf_counter()
+        stats.pop_time += now - phase_start
+        phase_start = now
 
-            self.open.pop(current_index)
+        if current_cell is not None:
+            self.closed.append(current_cell)
+            stats.expansions += 1
+            if self.on_expand is not None:
+                self.on_expand(current_cell, stats)
 
             if current_cell.state not in ["START", "GOAL"]:
                 self.map_obj.set_cell_state(current_cell, "CLOSED")  
             
             if current_cell == self.map_obj.get_goal_cell():
-                c = current_cell
-                while c is not None:
-                    if c.state not in ["START", "GOAL"]:
-                        self.map_obj.set_cell_state(c, "PATH")
-                    self.path.append(c)
-                    c = c.parent
+                self._reconstruct_path(current_cell)
+                stats.path_time += time.perf_counter() - phase_start
                 return False
 
-            for neighbour in current_cell.neighbours:
+            for neighbour, cost in self._successors(current_cell):
                 if neighbour.state in ["CLOSED", "BARRIER", "START"]: continue
 
-                g = current_cell.g + neighbour.weight
+                g = current_cell.g + cost
                 if g < neighbour.g:
                     neighbour.parent = current_cell
                     neighbour.g = g
                     neighbour.h = self._h(neighbour, self.map_obj.get_goal_cell())
                     neighbour.f = neighbour.g + neighbour.h
 
-                    in_open = False
-                    for open_cell in self.open:
-                        if neighbour == open_cell:
-                            in_open = True
-                            break
+                    in_open = (neighbour.row, neighbour.col) in self.open_pos
+                    self._push(neighbour)
 
-                    if not in_open:
-                        self.open.append(neighbour)
-                        if neighbour.state not in ["START", "GOAL"]:
-                            self.map_obj.set_cell_state(neighbour, "OPEN")  
-        
+                    stats.relaxations += 1
+                    stats.heuristic_evals += 1
+                    if in_open:
+                        stats.reopenings += 1
+                    elif neighbour.state not in ["START", "GOAL"]:
+                        self.map_obj.set_cell_state(neighbour, "OPEN")  
+
+            stats.peak_open = max(stats.peak_open, len(self.open_pos))
+            stats.expand_time += time.perf_counter() - phase_start
             return True
         else:
             return False
             
 
+    def _successors(self, cell):
+        """
+        Gets the cells reachable from a cell in one step
+
+        Args:
+            cell(Cell): cell being expanded
+
+        Return:
+            successors(list[tuple(Cell,float)]): neighbours with the cost of moving
+            into them. Moves that are not allowed are left out.
+        """
+
+        successors = []
+        for neighbour in cell.neighbours:
+            cost = self.map_obj.move_cost(cell, neighbour)
+            if cost < math.inf:
+                successors.append((neighbour, cost))
+        return successors
+
+    def _reconstruct_path(self, goal_cell):
+        """
+        Reconstructs path by following parents from the goal, and sets each cell
+        in the path to state: PATH
+
+        Args:
+            goal_cell(Cell): goal cell reached by the search
+        """
+
+        c = goal_cell
+        while c is not None:
+            if c.state not in ["START", "GOAL"]:
+                self.map_obj.set_cell_state(c, "PATH")
+            self.path.append(c)
+            c = c.parent
+
+    def _push(self, cell):
+        """
+        Pushes cell onto the open heap with its current scores
+
+        Args:
+            cell(Cell): cell to push
+        """
+
+        heapq.heappush(self.open, (cell.f, cell.h, next(self._counter), cell))
+        self.open_pos.add((cell.row, cell.col))
+
+    def _pop(self):
+        """
+        Pops the open cell with the lowest f score
+
+        Return:
+            cell(Cell): cell with lowest f score, or None if the open set is empty
+
+        Heap entries whose f score no longer matches the cell are stale copies
+        left behind by lazy deletion, and are skipped.
+        """
+
+        while self.open:
+            f, _, _, cell = heapq.heappop(self.open)
+            pos = (cell.row, cell.col)
+            if pos in self.open_pos and f == cell.f:
+                self.open_pos.remove(pos)
+                return cell
+            self.stats.stale_pops += 1
+        return None
+
     def _h(self, cell1, cell2):
         """
         Heuristic for calculating distance between two cells
@@ -108,7 +286,507 @@ class AStar(object):
             cell2(Cell): second cell
         
         Return:
-            distance(int): manhatten distance between cell1 and cell2
+            distance(float): manhatten distance between cell1 and cell2 on 4N maps,
+            octile distance on 8N maps
         """
-        
-        return abs(cell1.row - cell2.row) + abs(cell1.col - cell2.col)
+
+        return distance(cell1, cell2, self.map_obj.connectivity)
+
+
+class JumpPointSearch(AStar):
+    """
+    Jump Point Search (JPS) object for 8N maps
+
+    JPS is A* with symmetry pruning: in regions where every move has the same
+    cost, most cells lie on one of many equally short paths, and JPS jumps over
+    them in straight and diagonal lines, only adding the cells where a path may
+    have to turn (jump points) to the open set.
+
+    The pruning is only valid where costs are uniform, so it is only applied
+    around cells where the cell itself and all of its visitable neighbours have
+    weight 1. Any other cell stops a jump and is expanded with the ordinary A*
+    rules, which keeps the search optimal on weighted maps.
+
+    Corner cutting is not allowed, matching MapObj.move_cost.
+
+    The algorithm is based on
+    Harabor, D. and Grastien, A., "Online Graph Pruning for Pathfinding on Grid Maps", AAAI 2011.
+    """
+
+    def __init__(self, map_obj, heuristic = None, on_expand = None):
+        """
+        Initialize JPS
+
+        Args:
+            map_obj (MapObj): map consisting of a grid of cells with 8N connectivity
+            heuristic(function): admissible heuristic h(cell1, cell2)
+                If None, octile distance is used.
+            on_expand(function): optional hook on_expand(cell, stats), see AStar
+        """
+
+        if map_obj.connectivity != "8N":
+            raise ValueError("Jump Point Search requires a map with 8N connectivity")
+        super().__init__(map_obj, heuristic, on_expand)
+
+    def _successors(self, cell):
+        """
+        Gets the jump points reachable from a cell
+
+        Args:
+            cell(Cell): cell being expanded
+
+        Return:
+            successors(list[tuple(Cell,float)]): jump points with the cost of
+            moving to them in a straight or diagonal line
+        """
+
+        if not self._is_uniform(cell.row, cell.col):
+            return super()._successors(cell)
+
+        successors = []
+        for drow, dcol in self._directions(cell):
+            jump_point = self._jump(cell.row + drow, cell.col + dcol, drow, dcol)
+            if jump_point is None: continue
+
+            steps = max(abs(jump_point.row - cell.row), abs(jump_point.col - cell.col))
+            step_length = math.sqrt(2) if drow and dcol else 1
+            # All cells before the jump point have weight 1
+            successors.append((jump_point, step_length * (steps - 1 + jump_point.weight)))
+        return successors
+
+    def _directions(self, cell):
+        """
+        Gets the directions worth searching from a cell after pruning
+
+        Args:
+            cell(Cell): cell being expanded
+
+        Return:
+            directions(list[tuple(int,int)]): (drow, dcol) of each direction
+
+        Directions are pruned based on the direction the cell was reached from.
+        Only neighbours that can not be reached at least as cheaply without
+        passing through cell are kept. On straight moves, the perpendicular and
+        diagonal directions to a side are only kept if that side has a forced
+        neighbour, the same check that makes _jump stop at cell.
+        """
+
+        if cell.parent is None:
+            return [(drow, dcol) for drow in [-1, 0, 1] for dcol in [-1, 0, 1] if drow or dcol]
+
+        row, col = cell.row, cell.col
+        drow = (row > cell.parent.row) - (row < cell.parent.row)
+        dcol = (col > cell.parent.col) - (col < cell.parent.col)
+        walkable = self._is_walkable
+
+        directions = []
+        if drow and dcol: # Diagonal
+            if walkable(row + drow, col): directions.append((drow, 0))
+            if walkable(row, col + dcol): directions.append((0, dcol))
+            if walkable(row + drow, col) and walkable(row, col + dcol): directions.append((drow, dcol))
+        elif dcol: # Horizontal
+            if walkable(row, col + dcol): directions.append((0, dcol))
+            for side in [-1, 1]:
+                # A side neighbour is forced if the cell behind it is blocked, as
+                # it could otherwise be reached diagonally without passing cell
+                if walkable(row + side, col) and not walkable(row + side, col - dcol):
+                    directions.append((side, 0))
+                    if walkable(row, col + dcol): directions.append((side, dcol))
+        else: # Vertical
+            if walkable(row + drow, col): directions.append((drow, 0))
+            for side in [-1, 1]:
+                if walkable(row, col + side) and not walkable(row - drow, col + side):
+                    directions.append((0, side))
+                    if walkable(row + drow, col): directions.append((drow, side))
+        return directions
+
+    def _jump(self, row, col, drow, dcol):
+        """
+        Moves in a straight or diagonal line until a jump point is found
+
+        Args:
+            row(int): row of first cell in the line
+            col(int): column of first cell in the line
+            drow(int): row direction, -1, 0 or 1
+            dcol(int): column direction, -1, 0 or 1
+
+        Return:
+            jump_point(Cell): first jump point in the line, or None if the line
+            ends in a barrier or the edge of the map
+        """
+
+        walkable = self._is_walkable
+        goal_cell = self.map_obj.get_goal_cell()
+        while True:
+            if not walkable(row, col):
+                return None
+            if drow and dcol and not (walkable(row - drow, col) and walkable(row, col - dcol)):
+                return None # Diagonal move would cut a corner
+
+            cell = self.map_obj.cells[row][col]
+            if cell == goal_cell or not self._is_uniform(row, col):
+                return cell
+
+            if drow and dcol: # Diagonal
+                if self._jump(row + drow, col, drow, 0) or self._jump(row, col + dcol, 0, dcol):
+                    return cell
+            elif dcol: # Horizontal
+                if (walkable(row - 1, col) and not walkable(row - 1, col - dcol)) or \
+                   (walkable(row + 1, col) and not walkable(row + 1, col - dcol)):
+                    return cell
+            else: # Vertical
+                if (walkable(row, col - 1) and not walkable(row - drow, col - 1)) or \
+                   (walkable(row, col + 1) and not walkable(row - drow, col + 1)):
+                    return cell
+
+            row += drow
+            col += dcol
+
+    def _is_walkable(self, row, col):
+        """
+        Checks if a grid position is inside the map and not a barrier
+
+        Args:
+            row(int): row of cell
+            col(int): column of cell
+
+        Return:
+            walkable(bool): wether or not the position can be visited
+        """
+
+        return 0 <= row < self.map_obj.rows and 0 <= col < self.map_obj.cols \
+            and self.map_obj.cells[row][col].state != "BARRIER"
+
+    def _is_uniform(self, row, col):
+        """
+        Checks if all moves around a cell have unit weight
+
+        Args:
+            row(int): row of cell
+            col(int): column of cell
+
+        Return:
+            uniform(bool): wether or not the cell and all of its visitable
+            neighbours have weight 1
+        """
+
+        if self.map_obj.cells[row][col].weight != 1:
+            return False
+        for neighbour in self.map_obj.cells[row][col].neighbours:
+            if neighbour.state != "BARRIER" and neighbour.weight != 1:
+                return False
+        return True
+
+    def _reconstruct_path(self, goal_cell):
+        """
+        Reconstructs path by following parents from the goal, filling in the
+        cells jumped over between consecutive jump points
+
+        Args:
+            goal_cell(Cell): goal cell reached by the search
+        """
+
+        c = goal_cell
+        while c is not None:
+            self._add_path_cell(c)
+            if c.parent is not None:
+                drow = (c.parent.row > c.row) - (c.parent.row < c.row)
+                dcol = (c.parent.col > c.col) - (c.parent.col < c.col)
+                row, col = c.row + drow, c.col + dcol
+                while (row, col) != (c.parent.row, c.parent.col):
+                    self._add_path_cell(self.map_obj.cells[row][col])
+                    row += drow
+                    col += dcol
+            c = c.parent
+
+    def _add_path_cell(self, cell):
+        """
+        Appends a cell to self.path and sets it to state: PATH
+
+        Args:
+            cell(Cell): cell in path
+        """
+
+        if cell.state not in ["START", "GOAL"]:
+            self.map_obj.set_cell_state(cell, "PATH")
+        self.path.append(cell)
+
+
+class _Frontier(object):
+    """
+    One direction of a bidirectional search
+    """
+
+    def __init__(self, root_cell, open_state, closed_state):
+        """
+        Initialize frontier
+
+        Args:
+            root_cell(Cell): cell the search in this direction starts from
+            open_state(str): cell state of cells in this open set
+            closed_state(str): cell state of cells in this closed set
+        """
+
+        self.open_state = open_state
+        self.closed_state = closed_state
+
+        # g scores and parents keyed by grid position
+        self.g = {(root_cell.row, root_cell.col): 0}
+        self.parent = {(root_cell.row, root_cell.col): None}
+        self.closed = set()
+
+        # Binary heap of (key, potential, count, g, cell) entries with lazy deletion
+        self.open = []
+        self.open_pos = set()
+        self._counter = itertools.count()
+
+    def push(self, cell, g, potential):
+        """
+        Pushes cell onto the open heap
+
+        Args:
+            cell(Cell): cell to push
+            g(float): cost from root to cell
+            potential(float): potential of cell in this direction
+        """
+
+        heapq.heappush(self.open, (g + potential, potential, next(self._counter), g, cell))
+        self.open_pos.add((cell.row, cell.col))
+
+    def top_key(self):
+        """
+        Gets lowest key in the open set
+
+        Return:
+            key(float): lowest key, or math.inf if the open set is empty
+        """
+
+        while self.open:
+            key, _, _, g, cell = self.open[0]
+            pos = (cell.row, cell.col)
+            if pos not in self.closed and g == self.g[pos]:
+                return key
+            heapq.heappop(self.open)
+        return math.inf
+
+    def pop(self):
+        """
+        Pops the open cell with the lowest key and closes it
+
+        Return:
+            cell(Cell): cell with the lowest key
+                Only call this after top_key has returned a finite value.
+        """
+
+        self.top_key()
+        cell = heapq.heappop(self.open)[-1]
+        pos = (cell.row, cell.col)
+        self.open_pos.discard(pos)
+        self.closed.add(pos)
+        return cell
+
+class BidirectionalAStar(object):
+    """
+    Bidirectional A* object searching from the start and the goal at the same time
+
+    A forward A* from the start and a backward A* from the goal are expanded in
+    turn, always expanding the direction with the smaller open set. Whenever a
+    cell is reached from both directions, it gives a candidate path with cost
+    mu = g_forward + g_backward.
+
+    Both directions use the average potentials
+        p_forward(v) = (h(v, goal) - h(start, v)) / 2 = -p_backward(v)
+    instead of plain heuristics. These are consistent in both directions at
+    once, which allows the strong stopping criterion: the search stops when the
+    lowest keys of the two open sets add up to at least the best mu found, as
+    no path through an unexpanded cell can then be cheaper.
+
+    The algorithm is based on
+    Goldberg, A. V. and Harrelson, C., "Computing the Shortest Path: A* Search
+    Meets Graph Theory", SODA 2005.
+
+    Forward cells use states OPEN/CLOSED and backward cells use states
+    OPEN_BACKWARD/CLOSED_BACKWARD, so the visualizer shows both frontiers.
+
+    The goal is fixed when the search is created, so goals moved by
+    MapObj.move_goal are not followed.
+    """
+
+    def __init__(self, map_obj, heuristic = None):
+        """
+        Initialize bidirectional A*
+
+        Args:
+            map_obj (MapObj): map consisting of a grid of cells
+                This map is augmnented during the course of the search.
+            heuristic(function): consistent heuristic h(cell1, cell2)
+                If None, manhatten distance (octile distance on 8N maps) is used.
+        """
+
+        self.map_obj = map_obj
+        if heuristic is not None:
+            self._h = heuristic
+
+        self.start_cell = self.map_obj.get_start_cell()
+        self.goal_cell = self.map_obj.get_goal_cell()
+
+        self.forward = _Frontier(self.start_cell, "OPEN", "CLOSED")
+        self.backward = _Frontier(self.goal_cell, "OPEN_BACKWARD", "CLOSED_BACKWARD")
+        self.forward.push(self.start_cell, 0, self._potential(self.start_cell))
+        self.backward.push(self.goal_cell, 0, -self._potential(self.goal_cell))
+
+        # Cost of best path found so far, and the cell where its two halves meet
+        self.mu = math.inf
+        self.meeting_cell = None
+
+        self.path = []
+
+    def update(self):
+        """
+        Update step for bidirectional A*
+
+        Return:
+            running (boolean): wether or not the algorithm has terminated
+
+        Each update step expands one cell in one direction. When the search
+        terminates and a path exists, each cell in the path is set to state: PATH.
+        """
+
+        if self.forward.top_key() + self.backward.top_key() >= self.mu:
+            if self.meeting_cell is not None:
+                self._reconstruct_path()
+            return False
+
+        if len(self.forward.open_pos) <= len(self.backward.open_pos):
+            frontier, other = self.forward, self.backward
+            cell = frontier.pop()
+            steps = self._successors(cell)
+        else:
+            frontier, other = self.backward, self.forward
+            cell = frontier.pop()
+            steps = self._predecessors(cell)
+        self._set_state(cell, frontier.closed_state)
+
+        g_cell = frontier.g[(cell.row, cell.col)]
+        for neighbour, cost in steps:
+            pos = (neighbour.row, neighbour.col)
+            if pos in frontier.closed: continue
+
+            g = g_cell + cost
+            if g < frontier.g.get(pos, math.inf):
+                frontier.g[pos] = g
+                frontier.parent[pos] = cell
+                if frontier is self.forward:
+                    frontier.push(neighbour, g, self._potential(neighbour))
+                else:
+                    frontier.push(neighbour, g, -self._potential(neighbour))
+                self._set_state(neighbour, frontier.open_state)
+
+                if pos in other.g and g + other.g[pos] < self.mu:
+                    self.mu = g + other.g[pos]
+                    self.meeting_cell = neighbour
+        return True
+
+    def _successors(self, cell):
+        """
+        Gets the cells reachable from a cell in one step
+
+        Args:
+            cell(Cell): cell being expanded forwards
+
+        Return:
+            successors(list[tuple(Cell,float)]): neighbours with the cost of moving
+            from cell into them
+        """
+
+        successors = []
+        for neighbour in cell.neighbours:
+            cost = self.map_obj.move_cost(cell, neighbour)
+            if cost < math.inf:
+                successors.append((neighbour, cost))
+        return successors
+
+    def _predecessors(self, cell):
+        """
+        Gets the cells a cell can be reached from in one step
+
+        Args:
+            cell(Cell): cell being expanded backwards
+
+        Return:
+            predecessors(list[tuple(Cell,float)]): neighbours with the cost of
+            moving from them into cell
+        """
+
+        predecessors = []
+        for neighbour in cell.neighbours:
+            if neighbour.state == "BARRIER": continue
+            cost = self.map_obj.move_cost(neighbour, cell)
+            if cost < math.inf:
+                predecessors.append((neighbour, cost))
+        return predecessors
+
+    def _reconstruct_path(self):
+        """
+        Joins the forward and backward halves of the best path at the meeting
+        cell, and sets each cell in the path to state: PATH
+
+        Like in AStar, self.path goes from goal to start.
+        """
+
+        forward_half = []
+        c = self.meeting_cell
+        while c is not None:
+            forward_half.append(c)
+            c = self.forward.parent[(c.row, c.col)]
+
+        backward_half = []
+        c = self.backward.parent[(self.meeting_cell.row, self.meeting_cell.col)]
+        while c is not None:
+            backward_half.append(c)
+            c = self.backward.parent[(c.row, c.col)]
+
+        self.path = backward_half[::-1] + forward_half
+        for c in self.path:
+            self._set_state(c, "PATH")
+
+    def _potential(self, cell):
+        """
+        Forward average potential of a cell
+
+        Args:
+            cell(Cell): cell to calculate potential of
+
+        Return:
+            potential(float): (h(cell, goal) - h(start, cell)) / 2
+                The backward potential is the negative of this.
+        """
+
+        return (self._h(cell, self.goal_cell) - self._h(self.start_cell, cell)) / 2
+
+    def _set_state(self, cell, state):
+        """
+        Sets visual state of a cell, leaving START and GOAL cells untouched
+
+        Args:
+            cell(Cell): cell to affect
+            state(str): state to set
+        """
+
+        if cell.state not in ["START", "GOAL"]:
+            self.map_obj.set_cell_state(cell, state)
+
+    def _h(self, cell1, cell2):
+        """
+        Heuristic for calculating distance between two cells
+
+        Args:
+            cell1(Cell): first cell
+            cell2(Cell): second cell
+
+        Return:
+            distance(float): manhatten distance between cell1 and cell2 on 4N maps,
+            octile distance on 8N maps
+        """
+
+        return distance(cell1, cell2, self.map_obj.connectivity)
@@ -0,0 +1,273 @@
+import heapq
+import itertools
+import math
+import time
+
+from grid_a_star import SearchWorkspace, UNSEEN, OPEN, CLOSED
+
+class ARAStar(object):
+    """
+    Anytime Repairing A* (ARA*) on the flat arrays of a Grid
+
+    ARA* runs a series of weighted A* searches with f = g + weight * h, starting
+    with an inflated weight that finds a first path quickly, and lowering the
+    weight after every path found. Each search reuses the scores of the
+    previous ones, so only cells whose g score improved since they were
+    expanded (the inconsistent cells) are expanded again.
+
+    Every path found costs at most bound times the cost of the shortest path,
+    where bound is at most the current weight and is usually much lower. The
+    search can be stopped at a deadline at any time, returning the best path
+    found so far with its bound.
+
+    The heuristic must be consistent, which grid.h is when all weights are at
+    least 1.
+
+    The algorithm is based on
+    Likhachev, M., Gordon, G. and Thrun, S., "ARA*: Anytime A* with Provable
+    Bounds on Sub-Optimality", NIPS 2003.
+
+    Typical use case:
+    search = ARAStar(grid, (40, 32), (8, 5))
+    path, cost, bound = search.run(deadline = time.perf_counter() + 0.005)
+    """
+
+    def __init__(self, grid, start_pos, goal_pos, initial_weight = 3.0, weight_step = 0.5, workspace = None, heuristic = None):
+        """
+        Initialize ARA*
+
+        Args:
+            grid(Grid): map to search
+                The grid is only read, never modified.
+            start_pos(tuple(int,int)): grid position of start cell
+            goal_pos(tuple(int,int)): grid position of goal cell
+            initial_weight(float): heuristic weight of the first search, at least 1
+            weight_step(float): amount the weight is lowered by after each path found
+            workspace(SearchWorkspace): buffers to reuse from earlier searches
+                If None, a new workspace is allocated for this search only.
+            heuristic(function): consistent heuristic h(index, goal_index)
+                If None, grid.h (manhatten distance) is used.
+        """
+
+        if initial_weight < 1:
+            raise ValueError(f"Heuristic weight must be at least 1, got {initial_weight}")
+        if workspace is None:
+            workspace = SearchWorkspace(grid.size)
+        elif workspace.size != grid.size:
+            raise ValueError(f"Workspace of size {workspace.size} does not fit grid of size {grid.size}")
+        workspace.reset()
+
+        self.grid = grid
+        self.workspace = workspace
+        self.start = grid.index(*start_pos)
+        self.goal = grid.index(*goal_pos)
+        self.h = heuristic if heuristic is not None else grid.h
+
+        self.weight = initial_weight
+        self.weight_step = weight_step
+
+        # Binary heap of (f, count, g, index) entries with lazy deletion. An
+        # entry is stale if the cell is no longer open or its g has changed.
+        self.open = []
+        self._counter = itertools.count()
+
+        # Cells expanded in the current search, and cells whose g improved
+        # after they were expanded
+        self.closed = []
+        self.incons = set()
+
+        # Best path found so far, and the factor its cost is at most off by
+        self.path = []
+        self.cost = math.inf
+        self.bound = math.inf
+
+        self.expanded = 0
+        self.iterations = 0
+
+        workspace.touch(self.start)
+        workspace.g[self.start] = 0
+        workspace.touch(self.goal)
+        self._push(self.start)
+
+    def run(self, deadline = None):
+        """
+        Improves the path until it is optimal or the deadline has passed
+
+        Args:
+            deadline(float): time.perf_counter() value to stop at
+                If None, runs until the path is optimal.
+
+        Return:
+            path(list[tuple(int,int)]): best grid positions from start to goal
+                found so far. Empty if no path has been found yet.
+            cost(float): total weight of path, math.inf if there is no path
+            bound(float): cost is at most bound times the optimal cost,
+                math.inf if no path has been found yet
+
+        Can be called again with a later deadline to continue improving.
+        """
+
+        while self.bound > 1:
+            if not self._improve_path(deadline):
+                break # Deadline passed
+
+            self.iterations += 1
+            if self.workspace.g[self.goal] < math.inf:
+                self.cost = self.workspace.g[self.goal]
+                self.path = self._reconstruct_path(self.goal)
+                self.bound = min(self.weight, self._suboptimality())
+            elif not self.open:
+                break # Goal can not be reached
+
+            if self.bound > 1:
+                self.weight = max(1.0, self.weight - self.weight_step)
+                self._next_search()
+        return self.path, self.cost, self.bound
+
+    def _improve_path(self, deadline):
+        """
+        Runs weighted A* with the current weight until the goal can not be improved
+
+        Args:
+            deadline(float): time.perf_counter() value to stop at, or None
+
+        Return:
+            finished(bool): False if the deadline passed before the search finished
+        """
+
+        grid = self.grid
+        weights = grid.weights
+        workspace = self.workspace
+        g = workspace.g
+        parent = workspace.parent
+        state = workspace.state
+        stamp = workspace.stamp
+        generation = workspace.generation
+
+        while self.open:
+            f, _, entry_g, current = self.open[0]
+            if state[current] != OPEN or entry_g != g[current]:
+                heapq.heappop(self.open)
+                continue # Stale heap entry
+            if g[self.goal] <= f:
+                return True
+
+            if deadline is not None and time.perf_counter() >= deadline:
+                return False
+
+            heapq.heappop(self.open)
+            state[current] = CLOSED
+            self.closed.append(current)
+            self.expanded += 1
+
+            for neighbour in grid.neighbours(current):
+                if stamp[neighbour] != generation:
+                    workspace.touch(neighbour)
+
+                new_g = g[current] + weights[neighbour]
+                if new_g < g[neighbour]:
+                    g[neighbour] = new_g
+                    parent[neighbour] = current
+                    if state[neighbour] == CLOSED:
+                        self.incons.add(neighbour)
+                    else:
+                        self._push(neighbour)
+        return True
+
+    def _next_search(self):
+        """
+        Prepares the next search with the lowered weight
+
+        Open and inconsistent cells form the new open set with their f scores
+        recomputed for the new weight, and no cell is closed.
+        """
+
+        state = self.workspace.state
+        g = self.workspace.g
+
+        open_cells = {index for _, _, entry_g, index in self.open if state[index] == OPEN and entry_g == g[index]}
+        for index in self.closed:
+            state[index] = UNSEEN
+        open_cells.update(self.incons)
+        self.closed = []
+        self.incons = set()
+
+        self.open = []
+        for index in open_cells:
+            self._push(index)
+
+    def _suboptimality(self):
+        """
+        Bounds how far the cost of the current path can be from optimal
+
+        Return:
+            bound(float): g(goal) / min(g + h) over open and inconsistent cells,
+            1 if there are none
+        """
+
+        state = self.workspace.state
+        g = self.workspace.g
+        lower_bound = math.inf
+        for _, _, entry_g, index in self.open:
+            if state[index] == OPEN and entry_g == g[index]:
+                lower_bound = min(lower_bound, g[index] + self.h(index, self.goal))
+        for index in self.incons:
+            lower_bound = min(lower_bound, g[index] + self.h(index, self.goal))
+
+        if lower_bound == math.inf or g[self.goal] == 0:
+            return 1.0
+        return max(1.0, g[self.goal] / lower_bound)
+
+    def _push(self, index):
+        """
+        Opens a cell with its f score for the current weight
+
+        Args:
+            index(int): flat index of cell
+        """
+
+        g = self.workspace.g[index]
+        self.workspace.state[index] = OPEN
+        heapq.heappush(self.open, (g + self.weight * self.h(index, self.goal), next(self._counter), g, index))
+
+    def _reconstruct_path(self, index):
+        """
+        Reconstructs path by following parent indices
+
+        Args:
+            index(int): flat index of last cell in path
+
+        Return:
+            path(list[tuple(int,int)]): grid positions from start to index
+        """
+
+        path = []
+        while index != -1:
+            path.append(self.grid.pos(index))
+            index = self.workspace.parent[index]
+        path.reverse()
+        return path
+
+def anytime_solve(grid, start_pos, goal_pos, time_budget, initial_weight = 3.0, weight_step = 0.5, workspace = None, heuristic = None):
+    """
+    Finds the best path possible within a time budget
+
+    Args:
+        grid(Grid): map to search
+        start_pos(tuple(int,int)): grid position of start cell
+        goal_pos(tuple(int,int)): grid position of goal cell
+        time_budget(float): seconds the search may take
+        initial_weight(float): heuristic weight of the first search
+        weight_step(float): amount the weight is lowered by after each path found
+        workspace(SearchWorkspace): buffers to reuse between queries
+        heuristic(function): consistent heuristic h(index, goal_index)
+
+    Return:
+        path(list[tuple(int,int)]): grid positions from start to goal
+            Empty if no path was found in time.
+        cost(float): total weight of path, math.inf if there is no path
+        bound(float): cost is at most bound times the optimal cost
+    """
+
+    deadline = time.perf_counter() + time_budget
+    return ARAStar(grid, start_pos, goal_pos, initial_weight, weight_step, workspace, heuristic).run(deadline)
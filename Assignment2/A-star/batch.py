@@ -0,0 +1,100 @@
+from multiprocessing import Pool, shared_memory
+
+from grid import Grid, WEIGHT_ITEMSIZE
+from grid_a_star import GridAStar, SearchWorkspace
+
+# Grid and workspace of the current worker process, set by _init_worker
+_worker_grid = None
+_worker_workspace = None
+_worker_shm = None
+
+class BatchResult(object):
+    """
+    Result of a single query in a batch
+    """
+
+    def __init__(self, index, start_pos, goal_pos, path, cost, expanded):
+        """
+        Initialize result
+
+        Args:
+            index(int): position of the query in the list passed to batch_solve
+            start_pos(tuple(int,int)): grid position of start cell
+            goal_pos(tuple(int,int)): grid position of goal cell
+            path(list[tuple(int,int)]): grid positions from start to goal
+            cost(float): total weight of path, math.inf if there is no path
+            expanded(int): number of cells expanded by A*
+        """
+
+        self.index = index
+        self.start_pos = start_pos
+        self.goal_pos = goal_pos
+        self.path = path
+        self.cost = cost
+        self.expanded = expanded
+
+def _init_worker(shm_name, rows, cols):
+    """
+    Attaches a worker process to the shared grid
+
+    Args:
+        shm_name(str): name of the shared memory block holding the weights
+        rows(int): number of rows in grid
+        cols(int): number of columns in grid
+    """
+
+    global _worker_grid, _worker_workspace, _worker_shm
+
+    # The SharedMemory object is kept alive for as long as the worker lives, as
+    # the grid weights are a view into its buffer.
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_grid = Grid.from_buffer(rows, cols, _worker_shm.buf)
+    _worker_workspace = SearchWorkspace(_worker_grid.size)
+
+def _solve_query(query):
+    """
+    Solves a single query in a worker process
+
+    Args:
+        query(tuple(int,tuple(int,int),tuple(int,int))): index, start_pos and goal_pos
+
+    Return:
+        result(BatchResult): path, cost and number of expansions for query
+    """
+
+    index, start_pos, goal_pos = query
+    a_star = GridAStar(_worker_grid, start_pos, goal_pos, _worker_workspace)
+    path, cost = a_star.run()
+    return BatchResult(index, start_pos, goal_pos, path, cost, a_star.expanded)
+
+def batch_solve(grid, queries, processes = None, chunksize = 1):
+    """
+    Solves many queries on one grid using a pool of worker processes
+
+    Args:
+        grid(Grid): map to search
+        queries(list[tuple(tuple(int,int),tuple(int,int))]): (start_pos, goal_pos) pairs
+            For a list of tasks on the same map this is
+            [(task.start_pos, task.goal_pos) for task in tasks].
+        processes(int): number of worker processes, defaults to the number of CPUs
+        chunksize(int): number of queries sent to a worker at a time
+
+    Return:
+        results(generator[BatchResult]): one result per query in completion order
+            Use result.index to match a result with its query.
+
+    The weights of grid are copied once into a shared memory block which every
+    worker attaches to, so the map is neither re-parsed nor pickled per worker.
+    Each worker keeps its own SearchWorkspace for all of its queries.
+    """
+
+    shm = shared_memory.SharedMemory(create=True, size=max(grid.size * WEIGHT_ITEMSIZE, 1))
+    try:
+        shm.buf[:grid.size * WEIGHT_ITEMSIZE] = memoryview(grid.weights).cast("B")
+        jobs = ((index, start_pos, goal_pos) for index, (start_pos, goal_pos) in enumerate(queries))
+        with Pool(processes, initializer=_init_worker, initargs=(shm.name, grid.rows, grid.cols)) as pool:
+            for result in pool.imap_unordered(_solve_query, jobs, chunksize):
+                yield result
+    finally:
+        shm.close()
+        shm.unlink()
@@ -0,0 +1,310 @@
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from array import array
+from multiprocessing import get_context
+
+from a_star import AStar
+from grid import Grid, BARRIER
+from grid_a_star import GridAStar
+from map_obj import MapObj
+from task import Task, TASKS, MOVE_RATE
+
+try:
+    import resource
+except ImportError: # Not available on Windows
+    resource = None
+
+# Version of the result file layout
+RESULTS_VERSION = 1
+
+# Side lengths of the synthetic square maps in each suite
+SUITES = {
+    "quick": [50, 128, 256],
+    "full": [50, 128, 256, 512, 1024, 2048, 4096]
+}
+
+# Largest synthetic map searched with the Cell based AStar. Larger maps are only
+# searched with GridAStar, as a Cell object per cell would not fit in memory.
+MAX_CELL_MAP_SIZE = 1024
+
+# Fraction of cells turned into barriers, and weight distributions of the
+# remaining cells, used for synthetic maps
+BARRIER_DENSITIES = [0.0, 0.25]
+WEIGHT_DISTRIBUTIONS = {
+    "unit": [1],
+    "mixed": [1, 1, 2, 3, 4]
+}
+
+# Metrics compared against the baseline, higher is worse for all of them
+COMPARED_METRICS = ["search_time", "expanded", "peak_open", "peak_rss_kb"]
+
+# Times of identical code can differ by tens of milliseconds between runs, which
+# is a large fraction of the short searches. An increase of a time metric is
+# only reported as a regression if it is at least MIN_TIME_INCREASE seconds and
+# at least TIME_THRESHOLD relative to the baseline.
+MIN_TIME_INCREASE = 0.05
+TIME_THRESHOLD = 0.5
+
+# Default number of runs per case. Noise only ever makes a run slower, so time
+# metrics are the best of the runs, and peak RSS is the median.
+REPEAT = 5
+
+# Metrics that vary between runs of the same case
+TIME_METRICS = ["load_time", "search_time", "wall_time"]
+
+class BenchmarkCase(object):
+    """
+    A single search to benchmark
+    """
+
+    def __init__(self, name, engine, task, end_goal_moves = False):
+        """
+        Initialize case
+
+        Args:
+            name(str): unique name of the case, used to match it with the baseline
+            engine(str): "astar" for AStar on a MapObj, "grid" for GridAStar on a Grid
+            task(Task): task with start, goal and map
+            end_goal_moves(bool): wether or not the goal moves towards
+                task.end_goal_pos every MOVE_RATE steps, as in the visualizer
+        """
+
+        self.name = name
+        self.engine = engine
+        self.task = task
+        self.end_goal_moves = end_goal_moves
+
+def synthetic_map(path_to_map, size, density, weights, seed = 0):
+    """
+    Writes a random square compiled map
+
+    Args:
+        path_to_map(str): path/to/compiled/map
+        size(int): number of rows and columns
+        density(float): probability of a cell being a barrier
+        weights(list[int]): weights drawn uniformly for non-barrier cells
+        seed(int): seed of the random generator, so maps are reproducible
+
+    The top left and bottom right cells, used as start and goal, are never
+    barriers.
+    """
+
+    rng = random.Random(seed)
+    cells = array("i", [1]) * (size * size)
+    if density or len(weights) > 1:
+        for index in range(size * size):
+            cells[index] = BARRIER if rng.random() < density else rng.choice(weights)
+    cells[0] = cells[-1] = 1
+    Grid(size, size, cells).save_binary(path_to_map)
+
+def build_cases(map_dir, sizes):
+    """
+    Builds all cases of a suite
+
+    Args:
+        map_dir(str): directory to write synthetic maps to
+        sizes(list[int]): side lengths of synthetic maps
+
+    Return:
+        cases(list[BenchmarkCase]): built-in tasks followed by synthetic maps
+    """
+
+    cases = []
+    for task_num, task in enumerate(TASKS):
+        if task.start_pos is None or task.goal_pos is None: continue # Blank map
+        moving = task.end_goal_pos != task.goal_pos
+        cases.append(BenchmarkCase(f"task{task_num}", "astar", task, moving))
+        if not moving:
+            cases.append(BenchmarkCase(f"task{task_num}", "grid", task))
+
+    for size in sizes:
+        for density in BARRIER_DENSITIES:
+            for weights_name, weights in WEIGHT_DISTRIBUTIONS.items():
+                name = f"synthetic{size}_d{density:g}_{weights_name}"
+                path_to_map = os.path.join(map_dir, name + ".grid")
+                synthetic_map(path_to_map, size, density, weights)
+                task = Task(start_pos = (0, 0), goal_pos = (size - 1, size - 1), path_to_map = path_to_map)
+                if size <= MAX_CELL_MAP_SIZE:
+                    cases.append(BenchmarkCase(name, "astar", task))
+                cases.append(BenchmarkCase(name, "grid", task))
+    return cases
+
+def peak_rss_kb():
+    """
+    Gets the peak resident set size of the current process
+
+    Return:
+        peak_rss(int): peak RSS in kilobytes, None where it can not be measured
+    """
+
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss // 1024 if sys.platform == "darwin" else peak_rss # Bytes on macOS
+
+def run_case(case):
+    """
+    Runs a case and measures it
+
+    Args:
+        case(BenchmarkCase): case to run
+
+    Return:
+        result(dict): name, engine and measurements of the case
+
+    Must run in a fresh process for peak_rss_kb to belong to this case only.
+    """
+
+    start = time.perf_counter()
+    if case.engine == "astar":
+        map_obj = MapObj(case.task)
+        search = AStar(map_obj)
+        open_size = lambda: len(search.open_pos)
+    else:
+        grid = Grid.from_task(case.task)
+        search = GridAStar(grid, case.task.start_pos, case.task.goal_pos)
+        open_size = lambda: search.open_count # The heap also holds stale entries
+    load_time = time.perf_counter() - start
+
+    peak_open = open_size()
+    steps = 0
+    start = time.perf_counter()
+    while True:
+        steps += 1
+        if case.end_goal_moves and not steps % MOVE_RATE:
+            map_obj.move_goal()
+        running = search.update()
+        peak_open = max(peak_open, open_size())
+        if not running: break
+    search_time = time.perf_counter() - start
+
+    if case.engine == "astar":
+        expanded = len(search.closed)
+        cost = map_obj.get_goal_cell().g
+    else:
+        expanded = search.expanded
+        cost = search.cost
+
+    return {
+        "name": case.name,
+        "engine": case.engine,
+        "load_time": load_time,
+        "search_time": search_time,
+        "wall_time": load_time + search_time,
+        "expanded": expanded,
+        "peak_open": peak_open,
+        "peak_rss_kb": peak_rss_kb(),
+        "cost": cost if cost != math.inf else None,
+        "stats": search.stats.as_dict() if case.engine == "astar" else None
+    }
+
+def run_suite(cases, repeat = 1):
+    """
+    Runs every case in its own process
+
+    Args:
+        cases(list[BenchmarkCase]): cases to run
+        repeat(int): number of runs per case, the best time and median peak
+            RSS are reported
+
+    Return:
+        results(list[dict]): one result per case
+    """
+
+    # Spawned workers start from a clean interpreter, so the peak RSS of a case
+    # does not include memory of the parent or of earlier cases
+    context = get_context("spawn")
+    results = []
+    for case in cases:
+        runs = []
+        for _ in range(repeat):
+            with context.Pool(1) as pool:
+                runs.append(pool.apply(run_case, (case,)))
+        result = dict(runs[0])
+        for metric in TIME_METRICS:
+            result[metric] = min(run[metric] for run in runs)
+        if result["peak_rss_kb"] is not None:
+            result["peak_rss_kb"] = statistics.median(run["peak_rss_kb"] for run in runs)
+        results.append(result)
+        print(f"{case.name:32} {case.engine:6} {result['wall_time']:9.3f}s "
+              f"expanded={result['expanded']:<9} peak_open={result['peak_open']:<8} "
+              f"rss={result['peak_rss_kb']}kB", flush=True)
+    return results
+
+def compare(results, baseline, threshold):
+    """
+    Compares results against a baseline
+
+    Args:
+        results(list[dict]): results of this run
+        baseline(list[dict]): results of an earlier run
+        threshold(float): allowed relative increase of a metric, e.g. 0.1 for 10%
+            Time metrics are allowed at least TIME_THRESHOLD.
+
+    Return:
+        regressions(list[str]): description of every metric that got worse by
+        more than threshold
+    """
+
+    baseline_results = {(result["name"], result["engine"]): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = baseline_results.get((result["name"], result["engine"]))
+        if old is None: continue
+        for metric in COMPARED_METRICS:
+            if result.get(metric) is None or old.get(metric) is None: continue
+            allowed = threshold
+            if metric.endswith("_time"):
+                if result[metric] - old[metric] < MIN_TIME_INCREASE: continue
+                allowed = max(threshold, TIME_THRESHOLD)
+            if result[metric] > old[metric] * (1 + allowed):
+                regressions.append(f"{result['name']} ({result['engine']}): {metric} {old[metric]:g} -> {result[metric]:g}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmark of the path finding searches")
+    parser.add_argument("--suite", choices=SUITES.keys(), default="quick",
+                        help="sizes of synthetic maps, quick goes up to 256x256 and full up to 4096x4096")
+    parser.add_argument("--sizes", type=int, nargs="+", default=None, help="side lengths of synthetic maps, overrides --suite")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="runs per case, the best time is reported")
+    parser.add_argument("--output", default=None, help="write results as JSON to this file")
+    parser.add_argument("--baseline", default=None, help="JSON results of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="relative increase of a metric reported as a regression")
+    args = parser.parse_args()
+
+    sizes = args.sizes if args.sizes is not None else SUITES[args.suite]
+    with tempfile.TemporaryDirectory() as map_dir:
+        results = run_suite(build_cases(map_dir, sizes), args.repeat)
+
+    if args.output:
+        with open(args.output, "w") as results_file:
+            json.dump({
+                "version": RESULTS_VERSION,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "results": results
+            }, results_file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r") as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("version") != RESULTS_VERSION:
+            raise ValueError(f"{args.baseline} has results of version {baseline.get('version')}, expected {RESULTS_VERSION}")
+        regressions = compare(results, baseline["results"], args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions over {args.threshold:.0%} against {args.baseline}")
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,8 @@ COLORS = {
     "GOAL":(102, 255, 153),
     "OPEN":(255, 153, 0),
     "CLOSED":(0, 153, 204),
+    "OPEN_BACKWARD":(204, 102, 255),
+    "CLOSED_BACKWARD":(0, 204, 153),
     "PATH":(255, 204, 102)
 }
 
@@ -0,0 +1,37 @@
+import argparse
+import os
+
+from grid import Grid, BINARY_MAP_EXTENSION
+from tiled_grid import compile_tiled
+
+def compile_map(path_to_csv, path_to_map = None):
+    """
+    Compiles a CSV map into a binary map that can be memory-mapped
+
+    Args:
+        path_to_csv(str): path/to/csv/map
+        path_to_map(str): path/to/compiled/map
+            If None, the compiled map is stored next to the CSV map with the
+            extension replaced by BINARY_MAP_EXTENSION.
+
+    Return:
+        path_to_map(str): path of the compiled map
+    """
+
+    if path_to_map is None:
+        path_to_map = os.path.splitext(path_to_csv)[0] + BINARY_MAP_EXTENSION
+    Grid.from_csv(path_to_csv).save_binary(path_to_map)
+    return path_to_map
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile CSV maps into memory-mappable binary maps")
+    parser.add_argument("csv_maps", nargs="+", help="path/to/csv/map")
+    parser.add_argument("--tile-size", type=int, default=None,
+                        help="write tiled maps for out-of-core search, with tiles of this many rows and columns")
+    args = parser.parse_args()
+
+    for path_to_csv in args.csv_maps:
+        if args.tile_size:
+            print(f"{path_to_csv} -> {compile_tiled(path_to_csv, tile_size=args.tile_size)}")
+        else:
+            print(f"{path_to_csv} -> {compile_map(path_to_csv)}")
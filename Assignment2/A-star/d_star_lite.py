@@ -0,0 +1,308 @@
+import heapq
+import itertools
+import math
+
+from a_star import distance
+
+# Tolerance when comparing keys, which are sums of floats on 8N maps. Without it,
+# a key that ties with the goal key can round to just above it and end the
+# search before that cell is processed.
+KEY_TOLERANCE = 1e-9
+
+class DStarLite(object):
+    """
+    Incremental search object that repairs its previous result when the goal
+    moves or cell weights change, instead of searching from scratch
+
+    This is D* Lite with the roles of start and goal swapped. The search tree is
+    rooted at the (fixed) start cell, so the goal plays the part of the moving
+    agent in D* Lite: when the goal moves, only the key modifier km changes,
+    and when a cell is edited, only the vertices whose shortest distance is
+    affected by the edit are processed again.
+
+    The object is stepped with update() in the same way as AStar, and uses the
+    same cell states so it can be shown by the visualizer.
+
+    The algorithm is based on pseudocode from
+    Koenig, S. and Likhachev, M., "D* Lite", AAAI 2002.
+    """
+
+    def __init__(self, map_obj):
+        """
+        Initialize D* Lite
+
+        Args:
+            map_obj (MapObj): map consisting of a grid of cells
+                The search registers itself as a listener on the map, and is
+                notified of every weight or barrier change. Call detach() when
+                the search is no longer used.
+        """
+
+        self.map_obj = map_obj
+
+        # g and rhs values keyed by grid position. Missing entries are math.inf
+        self.g = {}
+        self.rhs = {}
+
+        # The open set is a binary heap of (key, count, cell) entries with lazy
+        # deletion. self.open_keys holds the current key of every open cell.
+        self.open = []
+        self.open_keys = {}
+        self._counter = itertools.count()
+
+        self.path = []
+        self.km = 0
+
+        # Edited cells that have not yet been repaired
+        self.changed_cells = []
+
+        self.start_cell = self.map_obj.get_start_cell()
+        self.last_goal_cell = self.map_obj.get_goal_cell()
+
+        self.rhs[self._pos(self.start_cell)] = 0
+        self._push(self.start_cell)
+
+        self.map_obj.add_listener(self._on_cell_change)
+
+    def update(self):
+        """
+        Update step for D* Lite
+
+        Return:
+            running (boolean): wether or not there is more work to do
+                The search keeps running after the path is found as long as the
+                goal has not reached its end position, since a goal move will
+                require repairs. A goal without an end position does not move.
+
+        Each update step first applies goal moves and cell edits since the
+        previous step, then processes one inconsistent cell. When the goal is
+        consistent, the path is reconstructed and each cell in the path is set
+        to state: PATH.
+        """
+
+        goal_cell = self.map_obj.get_goal_cell() if self.map_obj.goal_pos else None
+        if goal_cell is None:
+            return False
+
+        if goal_cell is not self.last_goal_cell:
+            self.km += self._h(self.last_goal_cell, goal_cell)
+            self.last_goal_cell = goal_cell
+            self._clear_path()
+
+        if self.changed_cells:
+            for cell in self.changed_cells:
+                # An edit changes the cost of moving into the cell, and on 8N
+                # maps the cost of diagonal moves between its neighbours
+                self._update_vertex(cell)
+                for neighbour in cell.neighbours:
+                    self._update_vertex(neighbour)
+            self.changed_cells = []
+            self._clear_path()
+
+        goal_key = self._key(goal_cell)
+        if self._top_key() < (goal_key[0] + KEY_TOLERANCE, goal_key[1]) or self._get_rhs(goal_cell) != self._get_g(goal_cell):
+            self._process_top()
+            return True
+
+        if not self.path:
+            self._reconstruct_path(goal_cell)
+        end_goal_pos = self.map_obj.end_goal_pos
+        return end_goal_pos is not None and self.map_obj.goal_pos != end_goal_pos
+
+    def detach(self):
+        """
+        Stops listening for edits to the map
+        """
+
+        self.map_obj.remove_listener(self._on_cell_change)
+
+    def _on_cell_change(self, cell):
+        """
+        Records an edited cell so it can be repaired in the next update step
+
+        Args:
+            cell(Cell): cell whose weight or barrier state changed
+        """
+
+        self.changed_cells.append(cell)
+
+    def _process_top(self):
+        """
+        Processes the open cell with the lowest key
+        """
+
+        k_old, _, cell = heapq.heappop(self.open)
+        pos = self._pos(cell)
+        if self.open_keys.get(pos) != k_old:
+            return # Stale heap entry
+        del self.open_keys[pos]
+
+        k_new = self._key(cell)
+        if k_old < k_new:
+            self._push(cell)
+        elif self._get_g(cell) > self._get_rhs(cell):
+            # Overconsistent: the cell got cheaper to reach
+            self.g[pos] = self.rhs[pos]
+            self._set_state(cell, "CLOSED")
+            for neighbour in cell.neighbours:
+                self._update_vertex(neighbour)
+        else:
+            # Underconsistent: the cell got more expensive to reach
+            self.g[pos] = math.inf
+            self._update_vertex(cell)
+            for neighbour in cell.neighbours:
+                self._update_vertex(neighbour)
+
+    def _update_vertex(self, cell):
+        """
+        Recomputes rhs of a cell and updates its membership in the open set
+
+        Args:
+            cell(Cell): cell to update
+        """
+
+        pos = self._pos(cell)
+        if cell is not self.start_cell:
+            rhs = math.inf
+            for neighbour in cell.neighbours:
+                rhs = min(rhs, self._get_g(neighbour) + self._cost(neighbour, cell))
+            self.rhs[pos] = rhs
+
+        self.open_keys.pop(pos, None)
+        if self._get_g(cell) != self._get_rhs(cell):
+            self._push(cell)
+            self._set_state(cell, "OPEN")
+        elif self._get_g(cell) < math.inf:
+            self._set_state(cell, "CLOSED")
+        else:
+            self._set_state(cell, "STANDARD")
+
+    def _reconstruct_path(self, goal_cell):
+        """
+        Reconstructs path from goal to start by following the cheapest
+        predecessors, and sets each cell in the path to state: PATH
+
+        Args:
+            goal_cell(Cell): current goal cell
+        """
+
+        if self._get_g(goal_cell) == math.inf:
+            return
+
+        c = goal_cell
+        self.path = [c]
+        while c is not self.start_cell:
+            # The predecessor on a shortest path minimizes g + cost of the move,
+            # which on 8N maps is not the same as minimizing g
+            cost, c = min(((self._get_g(n) + self._cost(n, c), n) for n in c.neighbours), key = lambda candidate: candidate[0])
+            if cost == math.inf:
+                self._clear_path()
+                return
+            self._set_state(c, "PATH")
+            self.path.append(c)
+
+    def _clear_path(self):
+        """
+        Resets cells in the previous path back to state: CLOSED
+        """
+
+        for cell in self.path:
+            self._set_state(cell, "CLOSED")
+        self.path = []
+
+    def _push(self, cell):
+        """
+        Pushes cell onto the open heap with its current key
+
+        Args:
+            cell(Cell): cell to push
+        """
+
+        key = self._key(cell)
+        self.open_keys[self._pos(cell)] = key
+        heapq.heappush(self.open, (key, next(self._counter), cell))
+
+    def _top_key(self):
+        """
+        Gets the lowest key in the open set
+
+        Return:
+            key(tuple(float,float)): lowest key, or (inf, inf) if the open set is empty
+        """
+
+        while self.open:
+            key, _, cell = self.open[0]
+            if self.open_keys.get(self._pos(cell)) == key:
+                return key
+            heapq.heappop(self.open)
+        return (math.inf, math.inf)
+
+    def _key(self, cell):
+        """
+        Calculates priority key of a cell
+
+        Args:
+            cell(Cell): cell to calculate key of
+
+        Return:
+            key(tuple(float,float)): key compared lexicographically
+        """
+
+        g = min(self._get_g(cell), self._get_rhs(cell))
+        return (g + self._h(cell, self.last_goal_cell) + self.km, g)
+
+    def _cost(self, cell, neighbour):
+        """
+        Cost of moving from a cell to one of its neighbours
+
+        Args:
+            cell(Cell): cell to move from
+            neighbour(Cell): neighbour to move into
+
+        Return:
+            cost(float): cost given by MapObj.move_cost, or math.inf if
+            neighbour has a negative weight
+
+        A goal moved onto a barrier by MapObj.move_goal keeps the barrier
+        weight (-1), so negative weights are also treated as barriers.
+        """
+
+        if neighbour.weight < 0:
+            return math.inf
+        return self.map_obj.move_cost(cell, neighbour)
+
+    def _get_g(self, cell):
+        return self.g.get(self._pos(cell), math.inf)
+
+    def _get_rhs(self, cell):
+        return self.rhs.get(self._pos(cell), math.inf)
+
+    def _pos(self, cell):
+        return (cell.row, cell.col)
+
+    def _set_state(self, cell, state):
+        """
+        Sets visual state of a cell, leaving START, GOAL and BARRIER cells untouched
+
+        Args:
+            cell(Cell): cell to affect
+            state(str): state to set
+        """
+
+        if cell.state not in ["START", "GOAL", "BARRIER"]:
+            self.map_obj.set_cell_state(cell, state)
+
+    def _h(self, cell1, cell2):
+        """
+        Heuristic for calculating distance between two cells
+
+        Args:
+            cell1(Cell): first cell
+            cell2(Cell): second cell
+
+        Return:
+            distance(float): manhatten distance between cell1 and cell2 on 4N maps,
+            octile distance on 8N maps
+        """
+
+        return distance(cell1, cell2, self.map_obj.connectivity)
@@ -0,0 +1,372 @@
+import heapq
+import math
+from array import array
+from collections import OrderedDict
+
+from grid import BARRIER
+
+class FlowField(object):
+    """
+    Distance field and flow field towards a single goal on a map
+
+    A single reverse Dijkstra from the goal gives, for every cell, the cost of
+    its shortest path to the goal (distance field) and the neighbour to move to
+    next on that path (flow field). Any number of agents heading for the same
+    goal can then read off their paths in O(path length) without searching.
+
+    Costs follow MapObj.move_cost, so 4N and 8N maps are supported.
+
+    When a cell changes, update_cell repairs the fields instead of rebuilding
+    them. A cell getting more expensive only affects the cells whose path to
+    the goal goes through it, which are recomputed. A cell getting cheaper is
+    handled by relaxing outwards from it, which only visits the cells whose
+    distance drops.
+    """
+
+    def __init__(self, map_obj, goal_pos):
+        """
+        Initialize and compute fields
+
+        Args:
+            map_obj(MapObj): map to compute fields on
+                The fields are only kept up to date through update_cell, e.g.
+                by FlowFieldCache listening to the map.
+            goal_pos(tuple(int,int)): grid position of the goal
+        """
+
+        self.map_obj = map_obj
+        self.goal_pos = goal_pos
+        self.goal = self._index(map_obj.cells[goal_pos[0]][goal_pos[1]])
+
+        size = map_obj.rows * map_obj.cols
+        self.distances = array("d", [math.inf]) * size
+
+        # Flat index of the next cell on the path to the goal, -1 for none
+        self.next_cells = array("i", [-1]) * size
+
+        # Weights the fields were computed with, BARRIER for barriers
+        self.weights = array("i", (self._weight(cell) for cell_row in map_obj.cells for cell in cell_row))
+
+        self.distances[self.goal] = 0
+        self._propagate([(0, self.goal)])
+
+    def distance(self, pos):
+        """
+        Gets cost of the shortest path from a cell to the goal
+
+        Args:
+            pos(tuple(int,int)): grid position of cell
+
+        Return:
+            distance(float): cost of path, math.inf if the goal can not be reached
+        """
+
+        return self.distances[pos[0] * self.map_obj.cols + pos[1]]
+
+    def next_step(self, pos):
+        """
+        Gets the cell to move to from a cell on its shortest path to the goal
+
+        Args:
+            pos(tuple(int,int)): grid position of cell
+
+        Return:
+            next_pos(tuple(int,int)): grid position of next cell, None at the
+            goal or if the goal can not be reached
+        """
+
+        next_cell = self.next_cells[pos[0] * self.map_obj.cols + pos[1]]
+        return divmod(next_cell, self.map_obj.cols) if next_cell != -1 else None
+
+    def path(self, start_pos):
+        """
+        Reads off the shortest path from a cell to the goal
+
+        Args:
+            start_pos(tuple(int,int)): grid position of start cell
+
+        Return:
+            path(list[tuple(int,int)]): grid positions from start to goal
+                Empty if the goal can not be reached.
+            cost(float): total weight of path, math.inf if there is no path
+        """
+
+        cols = self.map_obj.cols
+        index = start_pos[0] * cols + start_pos[1]
+        cost = self.distances[index]
+        if cost == math.inf:
+            return [], cost
+
+        path = [start_pos]
+        while index != self.goal:
+            index = self.next_cells[index]
+            path.append(divmod(index, cols))
+        return path, cost
+
+    def update_cell(self, cell):
+        """
+        Repairs the fields after the weight or barrier state of a cell changed
+
+        Args:
+            cell(Cell): changed cell
+        """
+
+        index = self._index(cell)
+        old_weight = self.weights[index]
+        weight = self._weight(cell)
+        if weight == old_weight:
+            return
+        self.weights[index] = weight
+
+        # Moves whose cost went up: moves into the cell, and on 8N maps the
+        # diagonal moves cutting its corner if it became a barrier
+        roots = []
+        if old_weight != BARRIER and (weight == BARRIER or weight > old_weight):
+            roots = [self._index(neighbour) for neighbour in cell.neighbours if self.next_cells[self._index(neighbour)] == index]
+            if weight == BARRIER:
+                roots.append(index)
+                for neighbour in cell.neighbours:
+                    next_cell = self.next_cells[self._index(neighbour)]
+                    if next_cell != -1 and self._cuts_corner(neighbour, next_cell, cell):
+                        roots.append(self._index(neighbour))
+
+        # Cells whose path used one of those moves have to be computed again
+        invalidated = self._subtree(roots)
+        for affected in invalidated:
+            self.distances[affected] = math.inf
+            self.next_cells[affected] = -1
+
+        # Seed the repair with every cell that may now have a better path: the
+        # invalidated cells, and the changed cell and its neighbours
+        open = []
+        seeds = set(invalidated)
+        seeds.add(index)
+        seeds.update(self._index(neighbour) for neighbour in cell.neighbours)
+        for seed in seeds:
+            distance, next_cell = self._best(seed)
+            if distance < self.distances[seed]:
+                self.distances[seed] = distance
+                self.next_cells[seed] = next_cell
+                open.append((distance, seed))
+        heapq.heapify(open)
+        self._propagate(open)
+
+    def _propagate(self, open):
+        """
+        Runs reverse Dijkstra until no distance can be lowered
+
+        Args:
+            open(list[tuple(float,int)]): heap of (distance, flat index) of
+                cells whose distance was lowered
+        """
+
+        cells = self.map_obj.cells
+        cols = self.map_obj.cols
+        distances = self.distances
+        while open:
+            distance, current = heapq.heappop(open)
+            if distance > distances[current]: continue
+
+            current_cell = cells[current // cols][current % cols]
+            for neighbour in current_cell.neighbours:
+                if self._weight(neighbour) == BARRIER: continue
+                new_distance = distance + self._cost(neighbour, current_cell)
+                index = neighbour.row * cols + neighbour.col
+                if new_distance < distances[index]:
+                    distances[index] = new_distance
+                    self.next_cells[index] = current
+                    heapq.heappush(open, (new_distance, index))
+
+    def _best(self, index):
+        """
+        Finds the cheapest way to the goal through the neighbours of a cell
+
+        Args:
+            index(int): flat index of cell
+
+        Return:
+            distance(float): cost of best path, math.inf if there is none
+            next_cell(int): flat index of neighbour on that path, -1 if none
+        """
+
+        if index == self.goal:
+            return 0, -1
+        cell = self.map_obj.cells[index // self.map_obj.cols][index % self.map_obj.cols]
+        if self._weight(cell) == BARRIER:
+            return math.inf, -1
+
+        best = (math.inf, -1)
+        for neighbour in cell.neighbours:
+            neighbour_index = self._index(neighbour)
+            distance = self.distances[neighbour_index] + self._cost(cell, neighbour)
+            if distance < best[0]:
+                best = (distance, neighbour_index)
+        return best
+
+    def _subtree(self, roots):
+        """
+        Gets cells whose path to the goal goes through any of the roots
+
+        Args:
+            roots(list[int]): flat indices of cells
+
+        Return:
+            subtree(set[int]): flat indices of the roots and their descendants
+            in the flow field
+        """
+
+        cells = self.map_obj.cells
+        cols = self.map_obj.cols
+        subtree = set(roots)
+        stack = list(subtree)
+        while stack:
+            current = stack.pop()
+            for neighbour in cells[current // cols][current % cols].neighbours:
+                index = self._index(neighbour)
+                if self.next_cells[index] == current and index not in subtree:
+                    subtree.add(index)
+                    stack.append(index)
+        return subtree
+
+    def _cuts_corner(self, cell, next_cell, corner):
+        """
+        Checks if a diagonal move passes the corner of a cell
+
+        Args:
+            cell(Cell): cell to move from
+            next_cell(int): flat index of cell to move to
+            corner(Cell): cell whose corner may be cut
+
+        Return:
+            cuts_corner(bool): wether or not corner shares an edge with both cells
+        """
+
+        row, col = divmod(next_cell, self.map_obj.cols)
+        if row == cell.row or col == cell.col:
+            return False
+        return (corner.row, corner.col) in [(cell.row, col), (row, cell.col)]
+
+    def _cost(self, cell, neighbour):
+        """
+        Cost of moving from a cell to one of its neighbours
+
+        Args:
+            cell(Cell): cell to move from
+            neighbour(Cell): neighbour to move into
+
+        Return:
+            cost(float): cost given by MapObj.move_cost, or math.inf if
+            neighbour has a negative weight
+
+        A goal moved onto a barrier by MapObj.move_goal keeps the barrier
+        weight (-1), so negative weights are also treated as barriers.
+        """
+
+        if neighbour.weight < 0:
+            return math.inf
+        return self.map_obj.move_cost(cell, neighbour)
+
+    def _index(self, cell):
+        return cell.row * self.map_obj.cols + cell.col
+
+    def _weight(self, cell):
+        return BARRIER if cell.state == "BARRIER" or cell.weight < 0 else cell.weight
+
+class FlowFieldCache(object):
+    """
+    Flow fields of the most recently used goals on a map, kept in sync with edits
+
+    Typical use case:
+    fields = FlowFieldCache(map_obj)
+    for start_pos in agents:
+        path, cost = fields.path(start_pos)
+    """
+
+    def __init__(self, map_obj, max_goals = 8):
+        """
+        Initialize cache
+
+        Args:
+            map_obj(MapObj): map to compute fields on
+                The cache registers itself as a listener on the map, and drops
+                all fields when the map is reset. Call detach() when it is no
+                longer used.
+            max_goals(int): number of goals whose fields are kept before the
+                least recently used one is dropped
+        """
+
+        self.map_obj = map_obj
+        self.max_goals = max_goals
+        self.fields = OrderedDict()
+        self.map_obj.add_listener(self._on_cell_change)
+        self.map_obj.add_reset_listener(self._on_reset)
+
+    def field(self, goal_pos = None):
+        """
+        Gets the flow field towards a goal, computing it if it is not cached
+
+        Args:
+            goal_pos(tuple(int,int)): grid position of goal
+                If None, the current goal of the map is used.
+
+        Return:
+            field(FlowField): fields towards goal_pos
+        """
+
+        if goal_pos is None:
+            goal_pos = self.map_obj.goal_pos
+
+        field = self.fields.get(goal_pos)
+        if field is not None:
+            self.fields.move_to_end(goal_pos)
+            return field
+
+        field = FlowField(self.map_obj, goal_pos)
+        self.fields[goal_pos] = field
+        if len(self.fields) > self.max_goals:
+            self.fields.popitem(last=False)
+        return field
+
+    def path(self, start_pos, goal_pos = None):
+        """
+        Reads off the shortest path from a cell to a goal
+
+        Args:
+            start_pos(tuple(int,int)): grid position of start cell
+            goal_pos(tuple(int,int)): grid position of goal, the current goal
+                of the map if None
+
+        Return:
+            path(list[tuple(int,int)]): grid positions from start to goal
+                Empty if the goal can not be reached.
+            cost(float): total weight of path, math.inf if there is no path
+        """
+
+        return self.field(goal_pos).path(start_pos)
+
+    def detach(self):
+        """
+        Stops listening for edits and resets of the map
+        """
+
+        self.map_obj.remove_listener(self._on_cell_change)
+        self.map_obj.remove_reset_listener(self._on_reset)
+
+    def _on_cell_change(self, cell):
+        """
+        Repairs all cached fields after an edit
+
+        Args:
+            cell(Cell): cell whose weight or barrier state changed
+        """
+
+        for field in self.fields.values():
+            field.update_cell(cell)
+
+    def _on_reset(self):
+        """
+        Drops all cached fields after the map has been reset, as they were
+        computed for the edited map
+        """
+
+        self.fields.clear()
@@ -0,0 +1,316 @@
+import csv
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+# Weight used for cells that can not be visited
+BARRIER = -1
+
+# Number of bytes used to store the weight of one cell
+WEIGHT_ITEMSIZE = array("i").itemsize
+
+# Compiled map file layout: a 16 byte header (magic, format version, dtype of
+# weights, byte order of weights, padding, rows, cols) followed by the weights
+# in row-major order
+BINARY_MAP_EXTENSION = ".grid"
+BINARY_MAP_MAGIC = b"GRID"
+BINARY_MAP_VERSION = 1
+BINARY_MAP_HEADER = struct.Struct("<4sBccxII")
+
+class Grid(object):
+    """
+    Compact grid map stored in flat arrays
+
+    Cells are addressed by flat index = row * cols + col, and all per-cell data
+    lives in typed arrays instead of Cell objects. This makes it possible to
+    search maps with millions of cells without allocating an object per cell.
+
+    Typical use cases:
+    grid = Grid.from_csv("csv_maps/Samfundet_map_1.csv")
+        Loads a CSV map directly into a grid
+    grid = Grid.from_map_obj(map_obj)
+        Takes a snapshot of the weights of a MapObj, e.g. one edited in the visualizer
+    """
+
+    def __init__(self, rows, cols, weights = None):
+        """
+        Initialize grid
+
+        Args:
+            rows(int): number of rows
+            cols(int): number of columns
+            weights(iterable[int]): row-major weights of all cells
+                A weight of BARRIER (-1) marks a cell that can not be visited.
+                If None, all cells get weight 1.
+        """
+
+        self.rows = rows
+        self.cols = cols
+        self.size = rows * cols
+
+        if weights is None:
+            self.weights = array("i", [1]) * self.size
+        else:
+            self.weights = array("i", weights)
+            if len(self.weights) != self.size:
+                raise ValueError(f"Expected {self.size} weights, got {len(self.weights)}")
+
+    @classmethod
+    def from_csv(cls, path_to_map):
+        """
+        Loads grid from CSV map
+
+        Args:
+            path_to_map(str): path/to/csv/map
+
+        Return:
+            grid(Grid): grid with the weights of the CSV map
+        """
+
+        weights = array("i")
+        rows = 0
+        cols = 0
+        with open(path_to_map, "r") as csv_file:
+            for line in csv.reader(csv_file, delimiter=','):
+                if not line: continue
+                weights.extend(int(num) for num in line)
+                cols = len(line)
+                rows += 1
+        return cls(rows, cols, weights)
+
+    @classmethod
+    def from_binary(cls, path_to_map):
+        """
+        Loads grid from a compiled map by memory-mapping it
+
+        Args:
+            path_to_map(str): path/to/compiled/map, as written by save_binary
+
+        Return:
+            grid(Grid): grid whose weights are a view of the mapped file
+
+        The file is mapped copy-on-write: loading does not read the weights, the
+        pages are shared with every other process mapping the same file, and
+        set_weight only changes this process' copy, never the file.
+        """
+
+        with open(path_to_map, "rb") as map_file:
+            header = map_file.read(BINARY_MAP_HEADER.size)
+            if len(header) != BINARY_MAP_HEADER.size:
+                raise ValueError(f"{path_to_map} is too short to be a compiled map")
+            magic, version, dtype, byteorder, rows, cols = BINARY_MAP_HEADER.unpack(header)
+            if magic != BINARY_MAP_MAGIC or version != BINARY_MAP_VERSION:
+                raise ValueError(f"{path_to_map} is not a compiled map of version {BINARY_MAP_VERSION}")
+            if dtype != b"i":
+                raise ValueError(f"Unsupported weight dtype {dtype} in {path_to_map}")
+
+            size = rows * cols
+            payload_size = size * WEIGHT_ITEMSIZE
+            if os.fstat(map_file.fileno()).st_size < BINARY_MAP_HEADER.size + payload_size:
+                raise ValueError(f"{path_to_map} is truncated")
+
+            if byteorder != (b"<" if sys.byteorder == "little" else b">"):
+                # Foreign byte order can not be used in place, so it is copied and swapped
+                weights = array("i")
+                weights.fromfile(map_file, size)
+                weights.byteswap()
+                return cls(rows, cols, weights)
+
+            if size == 0:
+                return cls(rows, cols)
+            mapped = mmap.mmap(map_file.fileno(), 0, access=mmap.ACCESS_COPY)
+
+        return cls.from_buffer(rows, cols, memoryview(mapped)[BINARY_MAP_HEADER.size:])
+
+    @classmethod
+    def load(cls, path_to_map):
+        """
+        Loads grid from either a CSV map or a compiled map
+
+        Args:
+            path_to_map(str): path/to/map
+                Files ending in BINARY_MAP_EXTENSION are loaded as compiled maps.
+
+        Return:
+            grid(Grid): grid with the weights of the map
+        """
+
+        if path_to_map.endswith(BINARY_MAP_EXTENSION):
+            return cls.from_binary(path_to_map)
+        return cls.from_csv(path_to_map)
+
+    @classmethod
+    def from_buffer(cls, rows, cols, buffer):
+        """
+        Creates grid on top of an existing buffer without copying it
+
+        Args:
+            rows(int): number of rows
+            cols(int): number of columns
+            buffer(buffer): buffer holding rows * cols native ints in row-major order
+                E.g. the buf of a multiprocessing.shared_memory.SharedMemory.
+
+        Return:
+            grid(Grid): grid whose weights are a view of buffer
+        """
+
+        grid = cls.__new__(cls)
+        grid.rows = rows
+        grid.cols = cols
+        grid.size = rows * cols
+        grid.weights = memoryview(buffer)[:grid.size * WEIGHT_ITEMSIZE].cast("i")
+        return grid
+
+    @classmethod
+    def from_task(cls, task):
+        """
+        Loads grid from task
+
+        Args:
+            task(Task): task with either a path to a map or a size for a blank map
+
+        Return:
+            grid(Grid): grid described by task
+        """
+
+        if task.path_to_map:
+            return cls.load(task.path_to_map)
+        return cls(task.rows, task.cols)
+
+    @classmethod
+    def from_map_obj(cls, map_obj):
+        """
+        Takes a snapshot of the weights of a map object
+
+        Args:
+            map_obj(MapObj): map to copy weights from
+
+        Return:
+            grid(Grid): grid with the same weights and barriers as map_obj
+        """
+
+        weights = array("i")
+        for cell_row in map_obj.cells:
+            weights.extend(BARRIER if cell.state == "BARRIER" else cell.weight for cell in cell_row)
+        return cls(map_obj.rows, map_obj.cols, weights)
+
+    def save_binary(self, path_to_map):
+        """
+        Saves grid as a compiled map that can be loaded with from_binary
+
+        Args:
+            path_to_map(str): path/to/compiled/map
+        """
+
+        with open(path_to_map, "wb") as map_file:
+            map_file.write(BINARY_MAP_HEADER.pack(BINARY_MAP_MAGIC, BINARY_MAP_VERSION, b"i",
+                                                  b"<" if sys.byteorder == "little" else b">",
+                                                  self.rows, self.cols))
+            map_file.write(memoryview(self.weights).cast("B"))
+
+    def digest(self):
+        """
+        Gets a hash of the size and weights of the grid
+
+        Return:
+            digest(str): hex digest that changes whenever any weight changes
+
+        Used to check that data computed for a map, e.g. landmark tables, still
+        belongs to the same map.
+        """
+
+        sha = hashlib.sha256(f"{self.rows}x{self.cols}".encode())
+        sha.update(memoryview(self.weights).cast("B"))
+        return sha.hexdigest()
+
+    def index(self, row, col):
+        """
+        Gets flat index of a grid position
+
+        Args:
+            row(int): row of cell
+            col(int): column of cell
+
+        Return:
+            index(int): flat index of cell
+        """
+
+        return row * self.cols + col
+
+    def pos(self, index):
+        """
+        Gets grid position of a flat index
+
+        Args:
+            index(int): flat index of cell
+
+        Return:
+            row(int), col(int): grid position of cell
+        """
+
+        return divmod(index, self.cols)
+
+    def is_barrier(self, index):
+        """
+        Checks if a cell can not be visited
+
+        Args:
+            index(int): flat index of cell
+
+        Return:
+            barrier(bool): wether or not the cell is a barrier
+        """
+
+        return self.weights[index] == BARRIER
+
+    def set_weight(self, row, col, weight):
+        """
+        Sets weight of a cell
+
+        Args:
+            row(int): row of cell
+            col(int): column of cell
+            weight(int): new weight, BARRIER (-1) makes the cell unvisitable
+        """
+
+        self.weights[row * self.cols + col] = weight
+
+    def neighbours(self, index):
+        """
+        Gets all visitable 4N neighbours of a cell
+
+        Args:
+            index(int): flat index of cell
+
+        Return:
+            neighbours(list[int]): flat indices of neighbours that are not barriers
+        """
+
+        cols = self.cols
+        weights = self.weights
+        row, col = divmod(index, cols)
+        neighbours = []
+        if row > 0 and weights[index - cols] != BARRIER: neighbours.append(index - cols)             # Above
+        if row < self.rows - 1 and weights[index + cols] != BARRIER: neighbours.append(index + cols) # Below
+        if col > 0 and weights[index - 1] != BARRIER: neighbours.append(index - 1)                   # Left
+        if col < cols - 1 and weights[index + 1] != BARRIER: neighbours.append(index + 1)            # Right
+        return neighbours
+
+    def h(self, index1, index2):
+        """
+        Heuristic for calculating distance between two cells
+
+        Args:
+            index1(int): flat index of first cell
+            index2(int): flat index of second cell
+
+        Return:
+            distance(int): manhatten distance between the cells
+        """
+
+        row1, col1 = divmod(index1, self.cols)
+        row2, col2 = divmod(index2, self.cols)
+        return abs(row1 - row2) + abs(col1 - col2)
@@ -0,0 +1,322 @@
+import heapq
+import itertools
+import math
+from array import array
+
+# Search state of a cell, stored as one byte per cell
+UNSEEN = 0
+OPEN = 1
+CLOSED = 2
+
+# Largest generation that fits in the stamp array
+MAX_GENERATION = 2**32 - 1
+
+class SearchWorkspace(object):
+    """
+    Per-cell search buffers that can be reused across many queries on one grid
+
+    Every cell carries a generation stamp. A cell whose stamp differs from the
+    current generation is treated as unseen, so starting a new search only
+    increments the generation instead of clearing every buffer. The cost of a
+    query then depends on the cells it touches, not on the size of the map.
+
+    A workspace must only be used by one search at a time.
+    """
+
+    def __init__(self, size):
+        """
+        Initialize workspace
+
+        Args:
+            size(int): number of cells in the grid the workspace is used for
+        """
+
+        self.size = size
+        self.g = array("d", [math.inf]) * size
+        self.parent = array("i", [-1]) * size
+        self.state = bytearray(size)
+        self.stamp = array("I", [0]) * size
+        self.generation = 0
+
+    def reset(self):
+        """
+        Invalidates all search state in O(1)
+
+        The buffers are only cleared for real once the generation counter
+        wraps around.
+        """
+
+        if self.generation == MAX_GENERATION:
+            self.stamp = array("I", [0]) * self.size
+            self.generation = 0
+        self.generation += 1
+
+    def touch(self, index):
+        """
+        Makes sure a cell has valid state for the current generation
+
+        Args:
+            index(int): flat index of cell
+
+        Cells not yet seen in this generation are reset to g = inf, no parent
+        and state UNSEEN.
+        """
+
+        if self.stamp[index] != self.generation:
+            self.stamp[index] = self.generation
+            self.g[index] = math.inf
+            self.parent[index] = -1
+            self.state[index] = UNSEEN
+
+class _Stamps(dict):
+    """
+    Generation stamps of a SparseWorkspace. Cells never touched have stamp 0.
+    """
+
+    def __missing__(self, index):
+        return 0
+
+class SparseWorkspace(object):
+    """
+    Search buffers holding only the cells a search touches
+
+    Has the same interface as SearchWorkspace, but keeps g, parent, state and
+    stamp in dicts instead of per-cell arrays. Memory then grows with the
+    number of cells touched by a query rather than with the size of the map,
+    which is what makes searching a TiledGrid larger than memory possible.
+    """
+
+    def __init__(self, size):
+        """
+        Initialize workspace
+
+        Args:
+            size(int): number of cells in the grid the workspace is used for
+        """
+
+        self.size = size
+        self.g = {}
+        self.parent = {}
+        self.state = {}
+        self.stamp = _Stamps()
+        self.generation = 1
+
+    def reset(self):
+        """
+        Drops all search state
+
+        Takes time proportional to the number of cells touched by the previous
+        search, which is never more than the search itself took.
+        """
+
+        self.g.clear()
+        self.parent.clear()
+        self.state.clear()
+        self.stamp.clear()
+
+    def touch(self, index):
+        """
+        Makes sure a cell has valid state for the current search
+
+        Args:
+            index(int): flat index of cell
+        """
+
+        if index not in self.stamp:
+            self.stamp[index] = self.generation
+            self.g[index] = math.inf
+            self.parent[index] = -1
+            self.state[index] = UNSEEN
+
+class GridAStar(object):
+    """
+    A* object performing the A* algorithm directly on the flat arrays of a Grid
+
+    This is the array-backed counterpart of AStar. Instead of storing g/h/f/parent
+    and state in Cell objects, the scores, parents and states of all cells are
+    kept in the typed arrays of a SearchWorkspace addressed by flat index.
+    """
+
+    def __init__(self, grid, start_pos, goal_pos, workspace = None, heuristic = None):
+        """
+        Initialize A*
+
+        Args:
+            grid(Grid): map to search, or a TiledGrid
+                The grid is only read, never modified.
+            start_pos(tuple(int,int)): grid position of start cell
+            goal_pos(tuple(int,int)): grid position of goal cell
+            workspace(SearchWorkspace): buffers to reuse from earlier searches
+                If None, a new workspace is allocated for this search only.
+                Use a SparseWorkspace for maps that do not fit in memory.
+            heuristic(function): admissible heuristic h(index, goal_index)
+                If None, grid.h (manhatten distance) is used.
+        """
+
+        if workspace is None:
+            workspace = SearchWorkspace(grid.size)
+        elif workspace.size != grid.size:
+            raise ValueError(f"Workspace of size {workspace.size} does not fit grid of size {grid.size}")
+        workspace.reset()
+
+        self.grid = grid
+        self.workspace = workspace
+        self.start = grid.index(*start_pos)
+        self.goal = grid.index(*goal_pos)
+        self.h = heuristic if heuristic is not None else grid.h
+
+        # Binary heap of (f, h, count, index) entries with lazy deletion, and
+        # the number of open cells, which excludes stale entries in the heap
+        self.open = []
+        self.open_count = 1
+        self._counter = itertools.count()
+
+        self.path = []
+        self.cost = math.inf
+        self.expanded = 0
+
+        workspace.touch(self.start)
+        workspace.g[self.start] = 0
+        workspace.state[self.start] = OPEN
+        h = self.h(self.start, self.goal)
+        heapq.heappush(self.open, (h, h, next(self._counter), self.start))
+
+    def update(self):
+        """
+        Update step for A* algorithm
+
+        Return:
+            running (boolean): wether or not the algorithm has terminated
+
+        Each update step expands the open cell with the lowest f score. If the
+        goal is reached, self.path and self.cost are set.
+        """
+
+        grid = self.grid
+        weights = grid.weights
+        workspace = self.workspace
+        g = workspace.g
+        parent = workspace.parent
+        state = workspace.state
+        stamp = workspace.stamp
+        generation = workspace.generation
+
+        while self.open:
+            f, h, _, current = heapq.heappop(self.open)
+            if state[current] == CLOSED or f > g[current] + h:
+                continue # Stale heap entry
+
+            state[current] = CLOSED
+            self.open_count -= 1
+            self.expanded += 1
+
+            if current == self.goal:
+                self.cost = g[current]
+                self.path = self._reconstruct_path(current)
+                return False
+
+            for neighbour in grid.neighbours(current):
+                if stamp[neighbour] != generation:
+                    workspace.touch(neighbour)
+                elif state[neighbour] == CLOSED:
+                    continue
+
+                new_g = g[current] + weights[neighbour]
+                if new_g < g[neighbour]:
+                    g[neighbour] = new_g
+                    parent[neighbour] = current
+                    if state[neighbour] != OPEN:
+                        state[neighbour] = OPEN
+                        self.open_count += 1
+                    h = self.h(neighbour, self.goal)
+                    heapq.heappush(self.open, (new_g + h, h, next(self._counter), neighbour))
+            return True
+        return False
+
+    def run(self):
+        """
+        Runs A* until it terminates
+
+        Return:
+            path(list[tuple(int,int)]): grid positions from start to goal
+                Empty if the goal can not be reached.
+            cost(float): total weight of path, math.inf if there is no path
+        """
+
+        while self.update():
+            pass
+        return self.path, self.cost
+
+    def _reconstruct_path(self, index):
+        """
+        Reconstructs path by following parent indices
+
+        Args:
+            index(int): flat index of last cell in path
+
+        Return:
+            path(list[tuple(int,int)]): grid positions from start to index
+        """
+
+        path = []
+        while index != -1:
+            path.append(self.grid.pos(index))
+            index = self.workspace.parent[index]
+        path.reverse()
+        return path
+
+def solve(grid, start_pos, goal_pos, workspace = None, heuristic = None):
+    """
+    Finds the shortest path between two cells without touching any Cell objects
+
+    Args:
+        grid(Grid): map to search
+        start_pos(tuple(int,int)): grid position of start cell
+        goal_pos(tuple(int,int)): grid position of goal cell
+        workspace(SearchWorkspace): buffers to reuse between queries
+            Pass the same workspace to every query on a grid to avoid
+            allocating and clearing per-cell buffers for each query.
+        heuristic(function): admissible heuristic h(index, goal_index)
+            If None, grid.h (manhatten distance) is used.
+
+    Return:
+        path(list[tuple(int,int)]): grid positions from start to goal
+            Empty if the goal can not be reached.
+        cost(float): total weight of path, math.inf if there is no path
+
+    Typical use case:
+    grid = Grid.from_csv("csv_maps/Samfundet_map_1.csv")
+    workspace = SearchWorkspace(grid.size)
+    for start_pos, goal_pos in queries:
+        path, cost = solve(grid, start_pos, goal_pos, workspace)
+    """
+
+    return GridAStar(grid, start_pos, goal_pos, workspace, heuristic).run()
+
+def dijkstra(grid, source):
+    """
+    Computes the cost of the shortest path from one cell to every other cell
+
+    Args:
+        grid(Grid): map to search
+        source(int): flat index of cell to start from
+
+    Return:
+        distances(array[float]): cost of moving from source to each cell by flat
+        index, math.inf for cells that can not be reached
+    """
+
+    weights = grid.weights
+    distances = array("d", [math.inf]) * grid.size
+    distances[source] = 0
+    open = [(0, source)]
+    while open:
+        distance, current = heapq.heappop(open)
+        if distance > distances[current]: continue
+
+        for neighbour in grid.neighbours(current):
+            new_distance = distance + weights[neighbour]
+            if new_distance < distances[neighbour]:
+                distances[neighbour] = new_distance
+                heapq.heappush(open, (new_distance, neighbour))
+    return distances
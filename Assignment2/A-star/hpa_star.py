@@ -0,0 +1,398 @@
+import heapq
+import itertools
+import math
+
+from grid import BARRIER
+
+# Entrances at least this wide get a transition at each end instead of one in the middle
+MAX_ENTRANCE_WIDTH = 6
+
+class HierarchicalGrid(object):
+    """
+    Hierarchical Path-Finding A* (HPA*) abstraction of a grid
+
+    The grid is split into square clusters. Along each border between two
+    neighbouring clusters, every run of cells that is open on both sides is an
+    entrance, and gets one or two transitions (pairs of cells facing each other
+    across the border). The cells of all transitions are the nodes of an
+    abstract graph, connected by
+        inter edges: across the border of a transition
+        intra edges: between nodes of the same cluster, with the exact cost of
+                     the shortest path inside that cluster
+    A query connects start and goal to the nodes of their clusters, runs A* on
+    the small abstract graph, and then refines each abstract edge to cells,
+    searching only inside the clusters the abstract path goes through.
+
+    The paths found are close to, but not always, the shortest, since paths may
+    only cross borders at transitions.
+
+    Editing a cell with update_cell only rebuilds the borders of the cluster the
+    cell is in and the intra edges of that cluster and its neighbours, so the
+    cost of an edit does not depend on the size of the map.
+
+    The algorithm is based on
+    Botea, A., Müller, M. and Schaeffer, J., "Near Optimal Hierarchical
+    Path-Finding", Journal of Game Development, 2004.
+
+    Typical use case:
+    hierarchy = HierarchicalGrid(Grid.from_csv("csv_maps/Samfundet_map_1.csv"))
+    path, cost = hierarchy.solve((40, 32), (8, 5))
+    """
+
+    def __init__(self, grid, cluster_size = 10):
+        """
+        Initialize abstraction
+
+        Args:
+            grid(Grid): map to build the abstraction for
+                The weights should only be changed through update_cell afterwards.
+            cluster_size(int): number of rows and columns in a cluster
+        """
+
+        self.grid = grid
+        self.cluster_size = cluster_size
+        self.cluster_rows = -(-grid.rows // cluster_size)
+        self.cluster_cols = -(-grid.cols // cluster_size)
+
+        # Transitions (index in first cluster, index in second cluster) keyed by border.
+        # A border is the pair of cluster ids (k, j) with k < j.
+        self.transitions = {}
+
+        # inter[a][b] is the cost of moving from node a to node b across a border
+        self.inter = {}
+
+        # intra[cluster][a] is a list of (b, cost) for nodes a and b in cluster
+        self.intra = {}
+
+        for cluster in range(self.cluster_rows * self.cluster_cols):
+            for border in self._borders(cluster):
+                if border not in self.transitions:
+                    self._build_border(border)
+        for cluster in range(self.cluster_rows * self.cluster_cols):
+            self._build_intra_edges(cluster)
+
+    def update_cell(self, row, col, weight):
+        """
+        Changes the weight of a cell and repairs the abstraction around it
+
+        Args:
+            row(int): row of cell
+            col(int): column of cell
+            weight(int): new weight, BARRIER (-1) makes the cell unvisitable
+        """
+
+        self.grid.set_weight(row, col, weight)
+
+        cluster = self._cluster_of(self.grid.index(row, col))
+        for border in self._borders(cluster):
+            self._build_border(border)
+
+        self._build_intra_edges(cluster)
+        for border in self._borders(cluster):
+            self._build_intra_edges(border[0] if border[1] == cluster else border[1])
+
+    def on_cell_change(self, cell):
+        """
+        Listener for MapObj.add_listener keeping the abstraction in sync with a map
+
+        Args:
+            cell(Cell): cell whose weight or barrier state changed
+        """
+
+        self.update_cell(cell.row, cell.col, BARRIER if cell.state == "BARRIER" else cell.weight)
+
+    def solve(self, start_pos, goal_pos):
+        """
+        Finds a path between two cells using the abstraction
+
+        Args:
+            start_pos(tuple(int,int)): grid position of start cell
+            goal_pos(tuple(int,int)): grid position of goal cell
+
+        Return:
+            path(list[tuple(int,int)]): grid positions from start to goal
+                Empty if the goal can not be reached.
+            cost(float): total weight of path, math.inf if there is no path
+        """
+
+        grid = self.grid
+        start = grid.index(*start_pos)
+        goal = grid.index(*goal_pos)
+        if grid.is_barrier(goal):
+            return [], math.inf
+        if start == goal:
+            return [start_pos], 0
+
+        # Temporary edges connecting start and goal to the nodes of their clusters
+        extra = {start: []}
+        start_cluster = self._cluster_of(start)
+        goal_cluster = self._cluster_of(goal)
+
+        from_start, _ = self._cluster_dijkstra(start, start_cluster)
+        for node in self._cluster_nodes(start_cluster):
+            if node in from_start:
+                extra[start].append((node, from_start[node]))
+        if goal in from_start:
+            extra[start].append((goal, from_start[goal]))
+
+        # Moving into a cell costs its weight, so reversing a path from u to
+        # the goal changes its cost by w(goal) - w(u)
+        from_goal, _ = self._cluster_dijkstra(goal, goal_cluster)
+        for node in self._cluster_nodes(goal_cluster):
+            if node in from_goal:
+                cost = from_goal[node] + grid.weights[goal] - grid.weights[node]
+                extra.setdefault(node, []).append((goal, cost))
+
+        abstract_path = self._abstract_search(start, goal, extra)
+        if not abstract_path:
+            return [], math.inf
+        return self._refine(abstract_path)
+
+    def _abstract_search(self, start, goal, extra):
+        """
+        Runs A* on the abstract graph
+
+        Args:
+            start(int): flat index of start cell
+            goal(int): flat index of goal cell
+            extra(dict[int,list[tuple(int,float)]]): temporary edges for this query
+
+        Return:
+            path(list[int]): abstract nodes from start to goal, empty if there is no path
+        """
+
+        g = {start: 0}
+        parent = {start: None}
+        closed = set()
+        counter = itertools.count()
+        open = [(self.grid.h(start, goal), next(counter), start)]
+        while open:
+            _, _, node = heapq.heappop(open)
+            if node in closed: continue
+            closed.add(node)
+
+            if node == goal:
+                path = []
+                while node is not None:
+                    path.append(node)
+                    node = parent[node]
+                return path[::-1]
+
+            for neighbour, cost in self._abstract_edges(node, extra):
+                new_g = g[node] + cost
+                if new_g < g.get(neighbour, math.inf):
+                    g[neighbour] = new_g
+                    parent[neighbour] = node
+                    heapq.heappush(open, (new_g + self.grid.h(neighbour, goal), next(counter), neighbour))
+        return []
+
+    def _abstract_edges(self, node, extra):
+        """
+        Gets outgoing edges of an abstract node
+
+        Args:
+            node(int): flat index of node
+            extra(dict[int,list[tuple(int,float)]]): temporary edges for this query
+
+        Return:
+            edges(list[tuple(int,float)]): (neighbour node, cost) pairs
+        """
+
+        edges = list(extra.get(node, []))
+        edges.extend(self.inter.get(node, {}).items())
+        edges.extend(self.intra[self._cluster_of(node)].get(node, []))
+        return edges
+
+    def _refine(self, abstract_path):
+        """
+        Turns an abstract path into a path of cells
+
+        Args:
+            abstract_path(list[int]): abstract nodes from start to goal
+
+        Return:
+            path(list[tuple(int,int)]): grid positions from start to goal
+            cost(float): total weight of path
+        """
+
+        grid = self.grid
+        path = [abstract_path[0]]
+        cost = 0
+        for a, b in zip(abstract_path, abstract_path[1:]):
+            if b in self.inter.get(a, {}) and self._cluster_of(a) != self._cluster_of(b):
+                path.append(b)
+                cost += grid.weights[b]
+                continue
+
+            distances, parent = self._cluster_dijkstra(a, self._cluster_of(a), target = b)
+            segment = []
+            node = b
+            while node != a:
+                segment.append(node)
+                node = parent[node]
+            path.extend(reversed(segment))
+            cost += distances[b]
+        return [grid.pos(index) for index in path], cost
+
+    def _cluster_dijkstra(self, source, cluster, target = None):
+        """
+        Runs Dijkstra from a cell without leaving its cluster
+
+        Args:
+            source(int): flat index of cell to start from
+            cluster(int): id of cluster to stay inside
+            target(int): flat index of cell to stop at, or None to reach all cells
+
+        Return:
+            distances(dict[int,float]): cost from source to each reached cell
+            parent(dict[int,int]): previous cell on the shortest path to each reached cell
+        """
+
+        grid = self.grid
+        weights = grid.weights
+        row_min, row_max, col_min, col_max = self._cluster_bounds(cluster)
+
+        distances = {source: 0}
+        parent = {}
+        closed = set()
+        open = [(0, source)]
+        while open:
+            distance, current = heapq.heappop(open)
+            if current in closed: continue
+            closed.add(current)
+            if current == target: break
+
+            for neighbour in grid.neighbours(current):
+                row, col = grid.pos(neighbour)
+                if not (row_min <= row < row_max and col_min <= col < col_max): continue
+
+                new_distance = distance + weights[neighbour]
+                if new_distance < distances.get(neighbour, math.inf):
+                    distances[neighbour] = new_distance
+                    parent[neighbour] = current
+                    heapq.heappush(open, (new_distance, neighbour))
+        return distances, parent
+
+    def _build_border(self, border):
+        """
+        Finds the transitions of a border and updates the inter edges
+
+        Args:
+            border(tuple(int,int)): ids of the two clusters sharing the border
+        """
+
+        grid = self.grid
+        for a, b in self.transitions.get(border, []):
+            for node, other in [(a, b), (b, a)]:
+                self.inter[node].pop(other, None)
+                if not self.inter[node]:
+                    del self.inter[node]
+
+        first, second = border
+        row_min, row_max, col_min, col_max = self._cluster_bounds(first)
+        if first // self.cluster_cols == second // self.cluster_cols:
+            # Vertical border: pairs of cells (row, col_max - 1) and (row, col_max)
+            pairs = [(grid.index(row, col_max - 1), grid.index(row, col_max)) for row in range(row_min, row_max)]
+        else:
+            # Horizontal border: pairs of cells (row_max - 1, col) and (row_max, col)
+            pairs = [(grid.index(row_max - 1, col), grid.index(row_max, col)) for col in range(col_min, col_max)]
+
+        transitions = []
+        run = []
+        for pair in pairs + [None]:
+            if pair is not None and not grid.is_barrier(pair[0]) and not grid.is_barrier(pair[1]):
+                run.append(pair)
+                continue
+            if len(run) >= MAX_ENTRANCE_WIDTH:
+                transitions.extend([run[0], run[-1]])
+            elif run:
+                transitions.append(run[len(run) // 2])
+            run = []
+
+        self.transitions[border] = transitions
+        for a, b in transitions:
+            self.inter.setdefault(a, {})[b] = grid.weights[b]
+            self.inter.setdefault(b, {})[a] = grid.weights[a]
+
+    def _build_intra_edges(self, cluster):
+        """
+        Computes the costs between all nodes of a cluster
+
+        Args:
+            cluster(int): id of cluster
+        """
+
+        nodes = self._cluster_nodes(cluster)
+        edges = {}
+        for node in nodes:
+            distances, _ = self._cluster_dijkstra(node, cluster)
+            edges[node] = [(other, distances[other]) for other in nodes if other != node and other in distances]
+        self.intra[cluster] = edges
+
+    def _cluster_nodes(self, cluster):
+        """
+        Gets the abstract nodes inside a cluster
+
+        Args:
+            cluster(int): id of cluster
+
+        Return:
+            nodes(set[int]): flat indices of transition cells inside cluster
+        """
+
+        nodes = set()
+        for border in self._borders(cluster):
+            for a, b in self.transitions.get(border, []):
+                nodes.add(a if self._cluster_of(a) == cluster else b)
+        return nodes
+
+    def _borders(self, cluster):
+        """
+        Gets the borders a cluster shares with its neighbours
+
+        Args:
+            cluster(int): id of cluster
+
+        Return:
+            borders(list[tuple(int,int)]): (k, j) cluster id pairs with k < j
+        """
+
+        cluster_row, cluster_col = divmod(cluster, self.cluster_cols)
+        borders = []
+        if cluster_row > 0: borders.append((cluster - self.cluster_cols, cluster))                     # Above
+        if cluster_row < self.cluster_rows - 1: borders.append((cluster, cluster + self.cluster_cols)) # Below
+        if cluster_col > 0: borders.append((cluster - 1, cluster))                                     # Left
+        if cluster_col < self.cluster_cols - 1: borders.append((cluster, cluster + 1))                 # Right
+        return borders
+
+    def _cluster_of(self, index):
+        """
+        Gets the cluster a cell belongs to
+
+        Args:
+            index(int): flat index of cell
+
+        Return:
+            cluster(int): id of cluster
+        """
+
+        row, col = self.grid.pos(index)
+        return (row // self.cluster_size) * self.cluster_cols + col // self.cluster_size
+
+    def _cluster_bounds(self, cluster):
+        """
+        Gets the cells covered by a cluster
+
+        Args:
+            cluster(int): id of cluster
+
+        Return:
+            row_min(int), row_max(int), col_min(int), col_max(int): half-open
+            ranges of rows and columns in cluster
+        """
+
+        cluster_row, cluster_col = divmod(cluster, self.cluster_cols)
+        row_min = cluster_row * self.cluster_size
+        col_min = cluster_col * self.cluster_size
+        return (row_min, min(row_min + self.cluster_size, self.grid.rows),
+                col_min, min(col_min + self.cluster_size, self.grid.cols))
@@ -0,0 +1,143 @@
+import math
+
+class IDAStar(object):
+    """
+    Memory-bounded Iterative Deepening A* (IDA*) on a Grid
+
+    IDA* runs depth-first searches from the start, pruning every branch whose
+    f = g + h exceeds a threshold. The first threshold is h(start), and each
+    following one is the lowest f that was pruned by the previous search. The
+    first path reaching the goal is then a shortest path.
+
+    A plain depth-first search keeps only the current path in memory, but on a
+    grid it reaches the same cell along many different paths. A transposition
+    table remembers the lowest g each cell has been reached with in the current
+    search, and prunes later visits that are not cheaper. The table holds at
+    most max_entries cells; once it is full, cells not yet in it are searched
+    again whenever they are reached, trading time for memory. Memory use is
+    O(max_entries + path length) regardless of the size of the map.
+
+    The algorithm is based on
+    Korf, R. E., "Depth-First Iterative-Deepening: An Optimal Admissible Tree
+    Search", Artificial Intelligence, 1985.
+
+    Typical use case:
+    path, cost = IDAStar(TiledGrid("city.tiles"), start_pos, goal_pos, max_entries = 100000).run()
+    """
+
+    def __init__(self, grid, start_pos, goal_pos, max_entries = 100000, heuristic = None):
+        """
+        Initialize IDA*
+
+        Args:
+            grid(Grid): map to search, or a TiledGrid
+                The grid is only read, never modified.
+            start_pos(tuple(int,int)): grid position of start cell
+            goal_pos(tuple(int,int)): grid position of goal cell
+            max_entries(int): number of cells the transposition table can hold
+            heuristic(function): admissible heuristic h(index, goal_index)
+                If None, grid.h (manhatten distance) is used.
+        """
+
+        self.grid = grid
+        self.start = grid.index(*start_pos)
+        self.goal = grid.index(*goal_pos)
+        self.max_entries = max_entries
+        self.h = heuristic if heuristic is not None else grid.h
+
+        self.path = []
+        self.cost = math.inf
+        self.expanded = 0
+        self.iterations = 0
+
+    def run(self):
+        """
+        Runs IDA* until the goal is found or can not be reached
+
+        Return:
+            path(list[tuple(int,int)]): grid positions from start to goal
+                Empty if the goal can not be reached.
+            cost(float): total weight of path, math.inf if there is no path
+        """
+
+        threshold = self.h(self.start, self.goal)
+        while threshold < math.inf:
+            self.iterations += 1
+            threshold = self._search(threshold)
+            if self.path:
+                break
+        return self.path, self.cost
+
+    def _search(self, threshold):
+        """
+        Depth-first search pruning cells with f above a threshold
+
+        Args:
+            threshold(float): highest f allowed
+
+        Return:
+            next_threshold(float): lowest f that was pruned, math.inf if nothing
+            was. If the goal is reached, self.path and self.cost are set.
+
+        The search is iterative, so the length of the path is not limited by
+        the recursion limit.
+        """
+
+        grid = self.grid
+        table = {self.start: 0}
+        path = [self.start]
+        on_path = {self.start}
+        costs = [0]
+        children = [self._children(self.start, 0)]
+        next_threshold = math.inf
+
+        while children:
+            current = path[-1]
+            if current == self.goal:
+                self.cost = costs[-1]
+                self.path = [grid.pos(index) for index in path]
+                return threshold
+
+            for neighbour, g, f in children[-1]:
+                if f > threshold:
+                    next_threshold = min(next_threshold, f)
+                    continue
+                if neighbour in on_path: continue
+                best = table.get(neighbour)
+                if best is not None and best <= g: continue
+
+                if best is not None or len(table) < self.max_entries:
+                    table[neighbour] = g
+                path.append(neighbour)
+                on_path.add(neighbour)
+                costs.append(g)
+                children.append(self._children(neighbour, g))
+                self.expanded += 1
+                break
+            else:
+                # All children searched, backtrack
+                on_path.remove(path.pop())
+                costs.pop()
+                children.pop()
+        return next_threshold
+
+    def _children(self, index, g):
+        """
+        Gets the neighbours of a cell, most promising first
+
+        Args:
+            index(int): flat index of cell
+            g(float): cost of reaching the cell
+
+        Return:
+            children(iterator[tuple(int,float,float)]): flat index, g and f of
+            each neighbour, ordered by f
+        """
+
+        weights = self.grid.weights
+        children = []
+        for neighbour in self.grid.neighbours(index):
+            new_g = g + weights[neighbour]
+            children.append((neighbour, new_g, new_g + self.h(neighbour, self.goal)))
+        children.sort(key = lambda child: child[2])
+        return iter(children)
@@ -0,0 +1,220 @@
+import math
+import os
+import struct
+from array import array
+
+from grid_a_star import dijkstra
+
+# File layout: header, landmark indices (int32), then one float64 distance table per landmark
+FILE_MAGIC = b"ALT1"
+HEADER_FORMAT = "<4s64sIII"
+
+class Landmarks(object):
+    """
+    ALT (A*, Landmarks, Triangle inequality) heuristic for a grid
+
+    For a few landmark cells L, the exact cost d(L, x) from L to every cell x is
+    precomputed with Dijkstra. By the triangle inequality, both
+        d(s, t) >= d(L, t) - d(L, s)
+        d(s, t) >= d(s, L) - d(t, L)
+    so the largest of these bounds over all landmarks is an admissible and
+    consistent heuristic. Unlike manhatten distance, it knows about barriers,
+    e.g. that the shortest way around a long wall is far longer than the
+    straight line through it.
+
+    Moving into a cell costs its weight, so d(x, L) = d(L, x) + w(L) - w(x) and a
+    single table per landmark gives bounds in both directions.
+
+    The tables are only valid for the weights they were computed for. Rebuild
+    them after editing the map, as an edit lowering a weight makes the bounds
+    inadmissible.
+
+    Typical use case:
+    grid = Grid.from_csv("csv_maps/Samfundet_map_1.csv")
+    landmarks = Landmarks.load_or_build(grid, "csv_maps/Samfundet_map_1.csv")
+    path, cost = solve(grid, start_pos, goal_pos, heuristic = landmarks.h)
+    """
+
+    def __init__(self, grid, landmarks, tables):
+        """
+        Initialize landmarks
+
+        Args:
+            grid(Grid): map the tables were computed for
+            landmarks(list[int]): flat indices of landmark cells
+            tables(list[array[float]]): tables[i][x] is the cost from landmarks[i] to x
+        """
+
+        self.grid = grid
+        self.landmarks = list(landmarks)
+        self.tables = tables
+
+    @classmethod
+    def build(cls, grid, num_landmarks = 8):
+        """
+        Selects landmarks and computes their distance tables
+
+        Args:
+            grid(Grid): map to compute landmarks for
+            num_landmarks(int): number of landmarks K
+
+        Return:
+            landmarks(Landmarks): landmarks with distance tables for grid
+
+        Landmarks are selected by farthest-point selection: each new landmark is
+        the reachable cell farthest from all landmarks selected so far. This
+        places landmarks at the ends of the map, where their bounds are tightest.
+        """
+
+        free_cells = [index for index in range(grid.size) if not grid.is_barrier(index)]
+        if not free_cells:
+            return cls(grid, [], [])
+
+        # Seed the selection with the cell farthest from an arbitrary free cell
+        seed = dijkstra(grid, free_cells[0])
+        landmark = max(free_cells, key = lambda index: seed[index] if seed[index] < math.inf else -1)
+
+        landmarks = []
+        tables = []
+        closest = array("d", [math.inf]) * grid.size
+        for _ in range(num_landmarks):
+            table = dijkstra(grid, landmark)
+            landmarks.append(landmark)
+            tables.append(table)
+
+            for index in free_cells:
+                if table[index] < closest[index]:
+                    closest[index] = table[index]
+
+            # Unreachable cells (other components) are picked before reachable ones
+            landmark = max(free_cells, key = lambda index: closest[index])
+            if closest[landmark] == 0:
+                break # Every free cell is a landmark
+        return cls(grid, landmarks, tables)
+
+    @classmethod
+    def load_or_build(cls, grid, path_to_map, num_landmarks = 8):
+        """
+        Loads landmarks stored next to a map, or builds and stores them
+
+        Args:
+            grid(Grid): map loaded from path_to_map
+            path_to_map(str): path/to/csv/map
+            num_landmarks(int): number of landmarks to build if none are stored
+
+        Return:
+            landmarks(Landmarks): landmarks with distance tables for grid
+
+        Stored landmarks are only used if they were built for the same weights
+        as grid, so editing the CSV file causes a rebuild.
+        """
+
+        path = landmarks_path(path_to_map)
+        landmarks = cls.load(grid, path)
+        if landmarks is None:
+            landmarks = cls.build(grid, num_landmarks)
+            landmarks.save(path)
+        return landmarks
+
+    @classmethod
+    def load(cls, grid, path):
+        """
+        Loads landmarks from file
+
+        Args:
+            grid(Grid): map the landmarks should belong to
+            path(str): path/to/landmarks/file
+
+        Return:
+            landmarks(Landmarks): loaded landmarks, or None if the file does not
+            exist or was built for a different map
+        """
+
+        if not os.path.exists(path):
+            return None
+
+        with open(path, "rb") as landmarks_file:
+            header = landmarks_file.read(struct.calcsize(HEADER_FORMAT))
+            if len(header) != struct.calcsize(HEADER_FORMAT):
+                return None
+            magic, digest, rows, cols, num_landmarks = struct.unpack(HEADER_FORMAT, header)
+            if magic != FILE_MAGIC or digest.decode() != grid.digest() or (rows, cols) != (grid.rows, grid.cols):
+                return None
+
+            landmarks = array("i")
+            landmarks.fromfile(landmarks_file, num_landmarks)
+            tables = []
+            for _ in range(num_landmarks):
+                table = array("d")
+                table.fromfile(landmarks_file, grid.size)
+                tables.append(table)
+        return cls(grid, landmarks, tables)
+
+    def save(self, path):
+        """
+        Saves landmarks to file
+
+        Args:
+            path(str): path/to/landmarks/file
+        """
+
+        with open(path, "wb") as landmarks_file:
+            landmarks_file.write(struct.pack(HEADER_FORMAT, FILE_MAGIC, self.grid.digest().encode(),
+                                             self.grid.rows, self.grid.cols, len(self.landmarks)))
+            array("i", self.landmarks).tofile(landmarks_file)
+            for table in self.tables:
+                table.tofile(landmarks_file)
+
+    def h(self, index, goal):
+        """
+        ALT heuristic between two cells
+
+        Args:
+            index(int): flat index of cell
+            goal(int): flat index of goal cell
+
+        Return:
+            distance(float): lower bound on the cost from index to goal
+        """
+
+        weights = self.grid.weights
+        bound = self.grid.h(index, goal)
+        for table in self.tables:
+            from_landmark = table[index]
+            goal_from_landmark = table[goal]
+            if from_landmark == math.inf or goal_from_landmark == math.inf:
+                continue
+            bound = max(bound,
+                        goal_from_landmark - from_landmark,
+                        from_landmark - goal_from_landmark - weights[index] + weights[goal])
+        return bound
+
+    def cell_h(self, cell1, cell2):
+        """
+        ALT heuristic between two cells, for use with AStar
+
+        Args:
+            cell1(Cell): first cell
+            cell2(Cell): second cell
+
+        Return:
+            distance(float): lower bound on the cost from cell1 to cell2
+
+        The tables are computed with 4N moves, so this is only admissible on
+        maps with 4N connectivity.
+        """
+
+        return self.h(self.grid.index(cell1.row, cell1.col), self.grid.index(cell2.row, cell2.col))
+
+def landmarks_path(path_to_map):
+    """
+    Gets path of the landmark file stored next to a map
+
+    Args:
+        path_to_map(str): path/to/csv/map
+
+    Return:
+        path(str): path/to/csv/map with the extension replaced by .landmarks
+    """
+
+    return os.path.splitext(path_to_map)[0] + ".landmarks"
@@ -1,10 +1,17 @@
 import argparse
 
 from map_obj import MapObj
-from visualizer import Visualizer
+from visualizer import Visualizer, FPS
 
 parser = argparse.ArgumentParser()
 parser.add_argument("--cell_size", type=int, default=16)
+parser.add_argument("--connectivity", choices=["4N", "8N"], default="4N")
+parser.add_argument("--steps_per_frame", type=float, default=1,
+                    help="search update steps per frame, below 1 to slow the search down")
+parser.add_argument("--frame_budget", type=float, default=None,
+                    help="milliseconds of search per frame, overrides --steps_per_frame")
+parser.add_argument("--fps", type=int, default=FPS, help="frame rate limit, 0 (default) for no limit")
 args = parser.parse_args()
 
-Visualizer(cell_size = args.cell_size)
+Visualizer(cell_size = args.cell_size, connectivity = args.connectivity,
+           steps_per_frame = args.steps_per_frame, frame_budget = args.frame_budget, fps = args.fps)
@@ -1,8 +1,10 @@
-import csv
 import copy
+import math
 import sys
+from array import array
 
 from cell import Cell
+from grid import Grid
 
 def get_state(weight, start = False, goal = False):
     """
@@ -28,20 +30,42 @@ class MapObj(object):
     Map class cotaining functions for creating, loading, and manipulating a map
     """
 
-    def __init__(self, task):
+    def __init__(self, task, connectivity = "4N"):
         """
         Initialize map object
 
         Args:
             task(Task): task which is used to initialize map
+            connectivity(str): connectivity between cells, either "4N" or "8N"
         """
 
+        if connectivity not in ["4N", "8N"]:
+            raise ValueError(f"Unsupported connectivity: {connectivity}")
+
         self.rows = None
         self.cols = None
         self.cells = None
 
         self.task = task
 
+        # Weights loaded from the map file of task, kept so reset does not reload the file
+        self.source_grid = None
+        self.connectivity = connectivity
+
+        # Functions called with a cell whenever its weight or barrier state changes
+        self.listeners = []
+
+        # Functions called without arguments whenever reset() replaces all cells
+        self.reset_listeners = []
+
+        # Cells whose color changed since they were last drawn, keyed by grid
+        # position. When all_dirty is set, every cell has to be drawn.
+        self.dirty_cells = {}
+        self.all_dirty = True
+
+        # Cells whose state was set since the last clean, keyed by grid position
+        self.touched_cells = {}
+
         # Position of start and goal cells
         self.start_pos = task.start_pos
         self.goal_pos = task.goal_pos
@@ -59,45 +83,65 @@ class MapObj(object):
         self.start_pos = None
         self.goal_pos = None
         self.end_goal_pos = None
-        self.cells = []
-        for row in range(self.rows):
-            row_cells = []
-            for col in range(self.cols):
-                cell = Cell(row, col, "STANDARD",1)
-                row_cells.append(cell)
-            self.cells.append(row_cells)
+        self._set_cells(array("i", [1]) * (self.rows * self.cols))
 
     def _load_map(self):
         """
-        Loads map from CSV file provided by task
+        Loads map from CSV file or compiled map provided by task
+
+        The file is only read the first time, later calls reuse self.source_grid.
+        """
+
+        if self.source_grid is None:
+            self.source_grid = Grid.load(self.task.path_to_map)
+
+        self.rows = self.source_grid.rows
+        self.cols = self.source_grid.cols
+        self._set_cells(self.source_grid.weights)
+
+    def _set_cells(self, weights):
+        """
+        Sets state and weight of every cell from row-major weights
+
+        Args:
+            weights(array[int]): row-major weights of all cells
+
+        The cells and their neighbour lists are only created when the size of
+        the map changes. Otherwise the existing cells are reset in place.
         """
 
-        with open(self.task.path_to_map, "r") as csv_file:
-            self.cells = []
-            csv_reader = csv.reader(csv_file, delimiter=',')
-            for row, line in enumerate(csv_reader):
-                row_cells = []
-                for col, num in enumerate(line):
-                    weight = int(num)
-                    state = get_state(weight, self.start_pos == (row,col), self.goal_pos == (row,col))
-                    cell = Cell(row, col, state, weight)
-                    row_cells.append(Cell(row, col, state, weight))
-                self.cells.append(row_cells)
+        if self.cells is None or len(self.cells) != self.rows or any(len(row_cells) != self.cols for row_cells in self.cells):
+            self.cells = [[Cell(row, col, "STANDARD", 1) for col in range(self.cols)] for row in range(self.rows)]
+            self._update_all_neighbours()
 
-            self.rows = len(self.cells)
-            self.cols = len(self.cells[0])
+        for row, row_cells in enumerate(self.cells):
+            for col, cell in enumerate(row_cells):
+                weight = weights[row * self.cols + col]
+                cell.set_state(get_state(weight, self.start_pos == (row,col), self.goal_pos == (row,col)), weight)
+                cell.reset_scores()
+                cell.parent = None
+        self.touched_cells = {}
 
     def clean(self):
         """
         Cleans cells affected by A*
+
+        Only cells whose state was set since the last clean, and the start and
+        goal cells, can have been affected, so only those are visited.
         """
 
-        for cell_row in self.cells:
-            for cell in cell_row:
-                if cell.state not in ["BARRIER","STANDARD","START","GOAL"]:
-                    cell.set_state("STANDARD")
-                cell.reset_scores()
-        self._update_all_neighbours()
+        cells = list(self.touched_cells.values())
+        if self.start_pos:
+            cells.append(self.get_start_cell())
+        if self.goal_pos:
+            cells.append(self.get_goal_cell())
+
+        for cell in cells:
+            if cell.state not in ["BARRIER","STANDARD","START","GOAL"]:
+                cell.set_state("STANDARD")
+                self.dirty_cells[(cell.row, cell.col)] = cell
+            cell.reset_scores()
+        self.touched_cells = {}
 
     def reset(self):
         """
@@ -108,7 +152,11 @@ class MapObj(object):
             self._set_blank_map()
         else:
             self._load_map()
-        self._update_all_neighbours()
+        self.mark_all_dirty()
+
+        # Cells are replaced without notifying self.listeners one by one
+        for listener in self.reset_listeners:
+            listener()
 
     def get_start_cell(self):
         """
@@ -145,14 +193,103 @@ class MapObj(object):
         elif cell.state == "GOAL":
             self.goal_pos = None
 
+        old_weight = cell.weight
+        was_barrier = cell.state == "BARRIER"
+
         cell.set_state(state, weight)
+        self.dirty_cells[(cell.row, cell.col)] = cell
+        self.touched_cells[(cell.row, cell.col)] = cell
 
         if state == "START":
             self.start_pos = (cell.row, cell.col)
         elif state == "GOAL":
             self.goal_pos = (cell.row ,cell.col)
-        
-        self._update_neighbours(cell)
+
+        if cell.weight != old_weight or was_barrier != (state == "BARRIER"):
+            for listener in self.listeners:
+                listener(cell)
+
+    def mark_all_dirty(self):
+        """
+        Marks every cell as changed, e.g. after the window has been recreated
+        """
+
+        self.all_dirty = True
+        self.dirty_cells = {}
+
+    def mark_dirty(self, cell):
+        """
+        Marks a cell as changed, e.g. when something drawn on top of it is removed
+
+        Args:
+            cell(Cell): cell to draw again
+        """
+
+        self.dirty_cells[(cell.row, cell.col)] = cell
+
+    def pop_dirty_cells(self):
+        """
+        Gets cells that changed since the last call, and marks them as drawn
+
+        Return:
+            dirty_cells(list[Cell]): cells that have to be drawn again
+                All cells after reset or mark_all_dirty.
+        """
+
+        if self.all_dirty:
+            dirty_cells = [cell for cell_row in self.cells for cell in cell_row]
+        else:
+            dirty_cells = list(self.dirty_cells.values())
+        self.all_dirty = False
+        self.dirty_cells = {}
+        return dirty_cells
+
+    def add_listener(self, listener):
+        """
+        Registers a function to be notified of edits to the map
+
+        Args:
+            listener(function): function called with a cell as only argument
+                whenever the weight or barrier state of that cell changes.
+
+        State changes made by a search (OPEN, CLOSED, PATH) do not notify
+        listeners, as they do not change the cost of moving through the map.
+        """
+
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """
+        Unregisters a function added with add_listener
+
+        Args:
+            listener(function): function to unregister
+        """
+
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def add_reset_listener(self, listener):
+        """
+        Registers a function to be notified when reset() replaces the map
+
+        Args:
+            listener(function): function called without arguments after every
+                reset, as the weights of any cell may have changed
+        """
+
+        self.reset_listeners.append(listener)
+
+    def remove_reset_listener(self, listener):
+        """
+        Unregisters a function added with add_reset_listener
+
+        Args:
+            listener(function): function to unregister
+        """
+
+        if listener in self.reset_listeners:
+            self.reset_listeners.remove(listener)
 
     def move_goal(self):
         """
@@ -172,9 +309,34 @@ class MapObj(object):
             else:
                 new_goal_cell = self.cells[self.goal_pos[0]][self.goal_pos[1] - 1]
 
-            self.set_cell_state(goal_cell, "STANDARD")
+            # A goal passing through a barrier keeps its weight, so the barrier is restored
+            self.set_cell_state(goal_cell, get_state(goal_cell.weight))
             self.set_cell_state(new_goal_cell, "GOAL")
 
+    def move_cost(self, cell, neighbour):
+        """
+        Cost of moving from a cell to one of its neighbours
+
+        Args:
+            cell(Cell): cell to move from
+            neighbour(Cell): neighbour to move into
+
+        Return:
+            cost(float): weight of neighbour, multiplied by sqrt(2) for diagonal
+            moves. math.inf if the move is not allowed.
+
+        A diagonal move is not allowed to cut the corner of a barrier, i.e. both
+        cells sharing an edge with the two cells must be visitable.
+        """
+
+        if neighbour.state == "BARRIER":
+            return math.inf
+        if cell.row != neighbour.row and cell.col != neighbour.col:
+            if self.cells[cell.row][neighbour.col].state == "BARRIER" or self.cells[neighbour.row][cell.col].state == "BARRIER":
+                return math.inf
+            return neighbour.weight * math.sqrt(2)
+        return neighbour.weight
+
     def _get_neighbour_cells(self, cell, connectivity = "4N"):
         """
         Gets all neighbour cells of a given cell
@@ -182,8 +344,8 @@ class MapObj(object):
         Args:
             cell(Cell): cell to get neighbours of
             connectivity(str): connectivity between cells
-                Only 4N connectivity is supported; however, 8N connectivity could be
-                added in the future.
+                "4N" gives the cells sharing an edge with cell, "8N" also gives
+                the diagonal cells.
 
         Return:
             neightbour_cells(list[Cell]): list of cells that are neighbours with
@@ -191,46 +353,33 @@ class MapObj(object):
         """
 
         neighbour_cells = []
-        if connectivity == "4N":
+        if connectivity in ["4N", "8N"]:
             if cell.row > 0: neighbour_cells.append(self.cells[cell.row - 1][cell.col])             # Above
             if cell.row < self.rows - 1: neighbour_cells.append(self.cells[cell.row + 1][cell.col]) # Below
             if cell.col > 0: neighbour_cells.append(self.cells[cell.row][cell.col - 1])             # Left
             if cell.col < self.cols - 1: neighbour_cells.append(self.cells[cell.row][cell.col + 1]) # Right  
+        if connectivity == "8N":
+            for drow, dcol in [(-1, -1), (-1, 1), (1, -1), (1, 1)]:
+                row = cell.row + drow
+                col = cell.col + dcol
+                if 0 <= row < self.rows and 0 <= col < self.cols:
+                    neighbour_cells.append(self.cells[row][col])                                   # Diagonals
         return neighbour_cells
 
 
-    def _update_neighbours(self, cell):
-        """
-        Updates neighbours of a cellS
-
-        Args:
-            cell(Cell): cell used to update neighbours
-
-        This is used to make sure the neighbours of cell has correct information
-        of the updated cell. 
-        
-        This could possibly be done in a more clever way where all cells just
-        point to their neighbours, but this is not done here.
-        """
-
-        for neighbour in cell.neighbours:
-            for n in neighbour.neighbours:
-                if n == cell:
-                    n = cell
-
     def _update_all_neighbours(self):
         """
         Updates neighbours of all cells
 
-        This is used to make sure all cells has stored correct neighbours.
-        
-        This could possibly be done in a more clever way where all cells just
-        point to their neighbours, but this is not done here.
+        Neighbour lists hold every cell inside the map, barriers included, and
+        barriers are rejected by move_cost. They therefore only depend on the
+        size and connectivity of the map, and are built once when the cells are
+        created. Edits never require patching them.
         """
 
         for cell_row in self.cells:
             for cell in cell_row:
-                cell.neighbours = self._get_neighbour_cells(cell)
+                cell.neighbours = self._get_neighbour_cells(cell, self.connectivity)
 
     
         
@@ -0,0 +1,204 @@
+from collections import OrderedDict
+
+from grid import BARRIER
+from grid_a_star import SearchWorkspace, solve
+
+class PathCache(object):
+    """
+    LRU cache of shortest paths on a grid, kept valid while the grid is edited
+
+    Queries are keyed by (start, goal). A miss runs A* on the grid and stores
+    the path, a hit returns the stored path without searching.
+
+    Edits made through update_cell only drop the cached paths they can affect:
+        A cell getting more expensive (or becoming a barrier) can only make
+        paths through that cell worse, so only those are dropped.
+        A cell getting cheaper (or stopping being a barrier) can also create a
+        better path through it. Every move costs at least 1, so a path from
+        start to goal through the cell costs at least h(start, cell) + h(cell, goal).
+        Cached paths costing more than that bound are dropped as well.
+    All other cached paths stay shortest paths after the edit.
+
+    Typical use case:
+    cache = PathCache(Grid.from_map_obj(map_obj), max_entries = 4096)
+    map_obj.add_listener(cache.on_cell_change)
+    path, cost = cache.solve((40, 32), (8, 5))
+    """
+
+    def __init__(self, grid, max_entries = 1024, max_cells = None, heuristic = None):
+        """
+        Initialize cache
+
+        Args:
+            grid(Grid): map to search
+                The weights should only be changed through update_cell afterwards.
+            max_entries(int): number of paths kept before the least recently
+                used one is evicted
+            max_cells(int): total number of cells in kept paths before the least
+                recently used path is evicted. None for no limit.
+            heuristic(function): admissible heuristic h(index, goal_index) used
+                on misses. If None, grid.h (manhatten distance) is used.
+        """
+
+        self.grid = grid
+        self.max_entries = max_entries
+        self.max_cells = max_cells
+        self.heuristic = heuristic
+        self.workspace = SearchWorkspace(grid.size)
+
+        # (start, goal) flat indices mapped to (path, cost), least recently used first
+        self.entries = OrderedDict()
+
+        # Flat index of a cell mapped to the keys of cached paths through it
+        self.paths_through = {}
+        self.cells = 0
+
+        # Incremented by every edit, so users can tell if the map has changed
+        self.version = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def solve(self, start_pos, goal_pos):
+        """
+        Finds the shortest path between two cells, using the cache if possible
+
+        Args:
+            start_pos(tuple(int,int)): grid position of start cell
+            goal_pos(tuple(int,int)): grid position of goal cell
+
+        Return:
+            path(list[tuple(int,int)]): grid positions from start to goal
+                Empty if the goal can not be reached.
+            cost(float): total weight of path, math.inf if there is no path
+        """
+
+        key = (self.grid.index(*start_pos), self.grid.index(*goal_pos))
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            path, cost = entry
+            return list(path), cost
+
+        self.misses += 1
+        path, cost = solve(self.grid, start_pos, goal_pos, self.workspace, self.heuristic)
+        self._store(key, tuple(path), cost)
+        return path, cost
+
+    def update_cell(self, row, col, weight):
+        """
+        Changes the weight of a cell and drops the cached paths it can affect
+
+        Args:
+            row(int): row of cell
+            col(int): column of cell
+            weight(int): new weight, BARRIER (-1) makes the cell unvisitable
+        """
+
+        grid = self.grid
+        index = grid.index(row, col)
+        old_weight = grid.weights[index]
+        grid.set_weight(row, col, weight)
+        self.version += 1
+        if weight == old_weight:
+            return
+
+        stale = set(self.paths_through.get(index, ()))
+        if old_weight == BARRIER or (weight != BARRIER and weight < old_weight):
+            for key, (_, cost) in self.entries.items():
+                start, goal = key
+                if grid.h(start, index) + grid.h(index, goal) < cost:
+                    stale.add(key)
+
+        for key in stale:
+            self._remove(key)
+        self.invalidations += len(stale)
+
+    def on_cell_change(self, cell):
+        """
+        Listener for MapObj.add_listener keeping the cache in sync with a map
+
+        Args:
+            cell(Cell): cell whose weight or barrier state changed
+        """
+
+        self.update_cell(cell.row, cell.col, BARRIER if cell.state == "BARRIER" else cell.weight)
+
+    def clear(self):
+        """
+        Drops all cached paths, keeping the metrics
+        """
+
+        self.entries.clear()
+        self.paths_through.clear()
+        self.cells = 0
+
+    def hit_rate(self):
+        """
+        Gets the fraction of queries answered from the cache
+
+        Return:
+            hit_rate(float): hits / queries, 0 if there were no queries
+        """
+
+        queries = self.hits + self.misses
+        return self.hits / queries if queries else 0
+
+    def metrics(self):
+        """
+        Gets counters of the cache, e.g. for logging
+
+        Return:
+            metrics(dict): hits, misses, hit rate, evictions, invalidations, and
+            number of cached paths and cells
+        """
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate(),
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "entries": len(self.entries),
+            "cells": self.cells,
+            "version": self.version
+        }
+
+    def _store(self, key, path, cost):
+        """
+        Adds a path and evicts least recently used paths beyond the limits
+
+        Args:
+            key(tuple(int,int)): flat indices of start and goal
+            path(tuple(tuple(int,int))): grid positions from start to goal
+            cost(float): total weight of path
+        """
+
+        self.entries[key] = (path, cost)
+        for pos in path:
+            self.paths_through.setdefault(self.grid.index(*pos), set()).add(key)
+        self.cells += len(path)
+
+        while len(self.entries) > self.max_entries or (self.max_cells is not None and self.cells > self.max_cells and len(self.entries) > 1):
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    def _remove(self, key):
+        """
+        Removes a path and its cells from the index
+
+        Args:
+            key(tuple(int,int)): flat indices of start and goal
+        """
+
+        path, _ = self.entries.pop(key)
+        for pos in path:
+            index = self.grid.index(*pos)
+            keys = self.paths_through[index]
+            keys.discard(key)
+            if not keys:
+                del self.paths_through[index]
+        self.cells -= len(path)
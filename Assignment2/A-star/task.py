@@ -34,4 +34,18 @@ class Task(object):
         self.path_to_map = path_to_map
         if not self.path_to_map:
             self.rows = rows
-            self.cols = cols
\ No newline at end of file
+            self.cols = cols
+
+
+# TASK1-5 corresponding with tasks in Assignment 2
+TASK0 = Task(rows = 50, cols = 50) # Initial map is blank
+TASK1 = Task(start_pos = (27, 18), goal_pos = (40, 32), path_to_map = "csv_maps/Samfundet_map_1.csv")
+TASK2 = Task(start_pos = (40, 32), goal_pos = (8, 5), path_to_map = "csv_maps/Samfundet_map_1.csv")
+TASK3 = Task(start_pos = (28, 32), goal_pos = (6, 32), path_to_map = "csv_maps/Samfundet_map_2.csv")
+TASK4 = Task(start_pos = (28, 32), goal_pos = (6, 32), path_to_map = "csv_maps/Samfundet_map_Edgar_full.csv")
+TASK5 = Task(start_pos = (14, 18), goal_pos = (6, 36), end_goal_pos = (6, 7), path_to_map = "csv_maps/Samfundet_map_2.csv")
+
+TASKS = [TASK0,TASK1,TASK2,TASK3,TASK4,TASK5]
+
+# Goal moves each MOVE_RATE iteration of A*
+MOVE_RATE = 4
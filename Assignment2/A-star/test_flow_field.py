@@ -0,0 +1,26 @@
+from flow_field import FlowFieldCache
+from map_obj import MapObj
+from task import Task
+
+
+def test_field_after_reset():
+    map_obj = MapObj(Task(rows = 5, cols = 5))
+    fields = FlowFieldCache(map_obj)
+    assert fields.field((4, 4)).distance((0, 0)) == 8
+
+    # Wall across the map with a gap in the last row
+    for row in range(4):
+        map_obj.set_cell_state(map_obj.cells[row][2], "BARRIER", -1)
+    assert fields.field((0, 0)).distance((0, 4)) == 12
+
+    map_obj.reset()
+    assert fields.field((0, 0)).distance((0, 4)) == 4
+    path, cost = fields.path((0, 4), (0, 0))
+    assert cost == 4 and path == [(0, 4), (0, 3), (0, 2), (0, 1), (0, 0)]
+
+
+def test_detach_stops_listening():
+    map_obj = MapObj(Task(rows = 5, cols = 5))
+    fields = FlowFieldCache(map_obj)
+    fields.detach()
+    assert not map_obj.listeners and not map_obj.reset_listeners
@@ -0,0 +1,327 @@
+import csv
+import os
+import struct
+import sys
+from array import array
+from collections import OrderedDict
+
+from grid import BARRIER, WEIGHT_ITEMSIZE, BINARY_MAP_EXTENSION, Grid
+
+# Tiled map file layout: a 24 byte header (magic, format version, byte order of
+# weights, padding, rows, cols, tile size, padding) followed by all tiles in
+# row-major tile order. Every tile holds tile_size * tile_size weights in
+# row-major order, and tiles on the bottom and right edge are padded with
+# barriers.
+TILED_MAP_EXTENSION = ".tiles"
+TILED_MAP_MAGIC = b"TILE"
+TILED_MAP_VERSION = 1
+TILED_MAP_HEADER = struct.Struct("<4sBcxxIIIxxxx")
+
+class TiledGrid(object):
+    """
+    Grid map stored in fixed-size tiles on disk and loaded lazily
+
+    Only the tiles the search actually reaches are read, and at most max_tiles
+    of them are kept in memory, evicting the least recently used tile first.
+    When a neighbour lookup gets close to the edge of a tile, the operating
+    system is asked to start reading the adjacent tile (read-ahead), so it is
+    usually already in the page cache when the frontier crosses over.
+
+    TiledGrid has the same read interface as Grid (rows, cols, size, weights,
+    index, pos, is_barrier, neighbours, h), so GridAStar and solve run on it
+    unchanged. Use a SparseWorkspace, as a SearchWorkspace allocates buffers
+    for every cell of the map.
+
+    Typical use case:
+    compile_tiled("city.grid", "city.tiles", tile_size = 256)
+    grid = TiledGrid("city.tiles", max_tiles = 64)
+    path, cost = solve(grid, start_pos, goal_pos, SparseWorkspace(grid.size))
+    """
+
+    def __init__(self, path_to_tiles, max_tiles = 64, readahead = 8):
+        """
+        Initialize tiled grid
+
+        Args:
+            path_to_tiles(str): path/to/tiled/map, as written by compile_tiled
+            max_tiles(int): number of tiles kept in memory
+            readahead(int): distance in cells from a tile edge at which the
+                adjacent tile is prefetched. 0 disables read-ahead.
+        """
+
+        self.tile_file = open(path_to_tiles, "rb")
+        header = self.tile_file.read(TILED_MAP_HEADER.size)
+        if len(header) != TILED_MAP_HEADER.size:
+            raise ValueError(f"{path_to_tiles} is too short to be a tiled map")
+        magic, version, byteorder, rows, cols, tile_size = TILED_MAP_HEADER.unpack(header)
+        if magic != TILED_MAP_MAGIC or version != TILED_MAP_VERSION:
+            raise ValueError(f"{path_to_tiles} is not a tiled map of version {TILED_MAP_VERSION}")
+
+        self.rows = rows
+        self.cols = cols
+        self.size = rows * cols
+        self.tile_size = tile_size
+        self.tile_rows = -(-rows // tile_size)
+        self.tile_cols = -(-cols // tile_size)
+        self.tile_bytes = tile_size * tile_size * WEIGHT_ITEMSIZE
+        self.swap_bytes = byteorder != (b"<" if sys.byteorder == "little" else b">")
+
+        self.max_tiles = max_tiles
+        self.readahead = readahead
+        self.tiles = OrderedDict()
+        self.weights = _TiledWeights(self)
+
+        # Number of tiles read from disk, useful to check the cache size
+        self.tile_loads = 0
+
+    def close(self):
+        """
+        Closes the tiled map file
+        """
+
+        self.tile_file.close()
+
+    def tile(self, tile_id):
+        """
+        Gets the weights of a tile, loading it from disk if it is not cached
+
+        Args:
+            tile_id(int): tile_row * tile_cols + tile_col
+
+        Return:
+            weights(array[int]): row-major weights of the tile
+        """
+
+        tiles = self.tiles
+        weights = tiles.get(tile_id)
+        if weights is not None:
+            tiles.move_to_end(tile_id)
+            return weights
+
+        weights = array("i")
+        weights.frombytes(os.pread(self.tile_file.fileno(), self.tile_bytes, self._tile_offset(tile_id)))
+        if self.swap_bytes:
+            weights.byteswap()
+        self.tile_loads += 1
+
+        tiles[tile_id] = weights
+        if len(tiles) > self.max_tiles:
+            tiles.popitem(last=False)
+        return weights
+
+    def index(self, row, col):
+        """
+        Gets flat index of a grid position
+
+        Args:
+            row(int): row of cell
+            col(int): column of cell
+
+        Return:
+            index(int): flat index of cell
+        """
+
+        return row * self.cols + col
+
+    def pos(self, index):
+        """
+        Gets grid position of a flat index
+
+        Args:
+            index(int): flat index of cell
+
+        Return:
+            row(int), col(int): grid position of cell
+        """
+
+        return divmod(index, self.cols)
+
+    def is_barrier(self, index):
+        """
+        Checks if a cell can not be visited
+
+        Args:
+            index(int): flat index of cell
+
+        Return:
+            barrier(bool): wether or not the cell is a barrier
+        """
+
+        return self.weights[index] == BARRIER
+
+    def neighbours(self, index):
+        """
+        Gets all visitable 4N neighbours of a cell
+
+        Args:
+            index(int): flat index of cell
+
+        Return:
+            neighbours(list[int]): flat indices of neighbours that are not barriers
+
+        Prefetches the adjacent tile if the cell is close to a tile edge.
+        """
+
+        cols = self.cols
+        weights = self.weights
+        row, col = divmod(index, cols)
+        if self.readahead:
+            self._readahead(row, col)
+
+        neighbours = []
+        if row > 0 and weights[index - cols] != BARRIER: neighbours.append(index - cols)             # Above
+        if row < self.rows - 1 and weights[index + cols] != BARRIER: neighbours.append(index + cols) # Below
+        if col > 0 and weights[index - 1] != BARRIER: neighbours.append(index - 1)                   # Left
+        if col < cols - 1 and weights[index + 1] != BARRIER: neighbours.append(index + 1)            # Right
+        return neighbours
+
+    def h(self, index1, index2):
+        """
+        Heuristic for calculating distance between two cells
+
+        Args:
+            index1(int): flat index of first cell
+            index2(int): flat index of second cell
+
+        Return:
+            distance(int): manhatten distance between the cells
+        """
+
+        row1, col1 = divmod(index1, self.cols)
+        row2, col2 = divmod(index2, self.cols)
+        return abs(row1 - row2) + abs(col1 - col2)
+
+    def _readahead(self, row, col):
+        """
+        Asks the operating system to start reading tiles next to a cell close
+        to a tile edge
+
+        Args:
+            row(int): row of cell
+            col(int): column of cell
+        """
+
+        tile_size = self.tile_size
+        tile_row, tile_col = row // tile_size, col // tile_size
+        row_in_tile, col_in_tile = row % tile_size, col % tile_size
+
+        adjacent = []
+        if row_in_tile < self.readahead and tile_row > 0: adjacent.append((tile_row - 1, tile_col))
+        if row_in_tile >= tile_size - self.readahead and tile_row < self.tile_rows - 1: adjacent.append((tile_row + 1, tile_col))
+        if col_in_tile < self.readahead and tile_col > 0: adjacent.append((tile_row, tile_col - 1))
+        if col_in_tile >= tile_size - self.readahead and tile_col < self.tile_cols - 1: adjacent.append((tile_row, tile_col + 1))
+
+        for adjacent_row, adjacent_col in adjacent:
+            tile_id = adjacent_row * self.tile_cols + adjacent_col
+            if tile_id not in self.tiles and hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(self.tile_file.fileno(), self._tile_offset(tile_id), self.tile_bytes, os.POSIX_FADV_WILLNEED)
+
+    def _tile_offset(self, tile_id):
+        """
+        Gets position of a tile in the tiled map file
+
+        Args:
+            tile_id(int): tile_row * tile_cols + tile_col
+
+        Return:
+            offset(int): byte offset of the first weight of the tile
+        """
+
+        return TILED_MAP_HEADER.size + tile_id * self.tile_bytes
+
+class _TiledWeights(object):
+    """
+    Read-only view making the weights of a TiledGrid indexable by flat index
+    """
+
+    def __init__(self, tiled_grid):
+        self.tiled_grid = tiled_grid
+
+    def __len__(self):
+        return self.tiled_grid.size
+
+    def __getitem__(self, index):
+        tiled_grid = self.tiled_grid
+        tile_size = tiled_grid.tile_size
+        row, col = divmod(index, tiled_grid.cols)
+        tile_id = (row // tile_size) * tiled_grid.tile_cols + col // tile_size
+        return tiled_grid.tile(tile_id)[(row % tile_size) * tile_size + col % tile_size]
+
+def compile_tiled(path_to_map, path_to_tiles = None, tile_size = 256):
+    """
+    Converts a CSV map or compiled map into a tiled map
+
+    Args:
+        path_to_map(str): path/to/map, either CSV or compiled (BINARY_MAP_EXTENSION)
+        path_to_tiles(str): path/to/tiled/map
+            If None, the tiled map is stored next to path_to_map with the
+            extension replaced by TILED_MAP_EXTENSION.
+        tile_size(int): number of rows and columns in a tile
+
+    Return:
+        path_to_tiles(str): path of the tiled map
+
+    The map is converted one band of tile_size rows at a time, so only one band
+    is held in memory. A compiled map is memory-mapped, so it is not read in
+    full either.
+    """
+
+    if path_to_tiles is None:
+        path_to_tiles = os.path.splitext(path_to_map)[0] + TILED_MAP_EXTENSION
+
+    if path_to_map.endswith(BINARY_MAP_EXTENSION):
+        grid = Grid.from_binary(path_to_map)
+        rows_iter = (grid.weights[row * grid.cols:(row + 1) * grid.cols] for row in range(grid.rows))
+        csv_file = None
+    else:
+        csv_file = open(path_to_map, "r")
+        rows_iter = ([int(num) for num in line] for line in csv.reader(csv_file, delimiter=',') if line)
+
+    byteorder = b"<" if sys.byteorder == "little" else b">"
+    rows = 0
+    cols = None
+    try:
+        with open(path_to_tiles, "wb") as tile_file:
+            # Header is rewritten once the number of rows is known
+            tile_file.write(TILED_MAP_HEADER.pack(TILED_MAP_MAGIC, TILED_MAP_VERSION, byteorder, 0, 0, tile_size))
+
+            band = []
+            for line in rows_iter:
+                if cols is None:
+                    cols = len(line)
+                band.append(line)
+                rows += 1
+                if len(band) == tile_size:
+                    _write_band(tile_file, band, cols, tile_size)
+                    band = []
+            if band:
+                _write_band(tile_file, band, cols, tile_size)
+
+            tile_file.seek(0)
+            tile_file.write(TILED_MAP_HEADER.pack(TILED_MAP_MAGIC, TILED_MAP_VERSION, byteorder, rows, cols or 0, tile_size))
+    finally:
+        if csv_file is not None:
+            csv_file.close()
+    return path_to_tiles
+
+def _write_band(tile_file, band, cols, tile_size):
+    """
+    Writes one row of tiles
+
+    Args:
+        tile_file(file): tiled map file opened for writing
+        band(list[list[int]]): up to tile_size rows of weights
+        cols(int): number of columns in map
+        tile_size(int): number of rows and columns in a tile
+    """
+
+    padding = array("i", [BARRIER]) * tile_size
+    for col_min in range(0, cols, tile_size):
+        tile = array("i")
+        for line in band:
+            row_weights = array("i", line[col_min:col_min + tile_size])
+            tile.extend(row_weights)
+            tile.extend(padding[:tile_size - len(row_weights)])
+        for _ in range(tile_size - len(band)):
+            tile.extend(padding)
+        tile.tofile(tile_file)
@@ -3,37 +3,51 @@ import time
 import os
 
 from map_obj import MapObj
-from a_star import AStar
-from task import Task
+from a_star import AStar, BidirectionalAStar, JumpPointSearch
+from d_star_lite import DStarLite
+from task import TASK0, TASKS, MOVE_RATE
 
 
-# TASK1-5 corresponding with tasks in Assignment 2
-TASK0 = Task(rows = 50, cols = 50) # Initial map is blank
-TASK1 = Task(start_pos = (27, 18), goal_pos = (40, 32), path_to_map = "csv_maps/Samfundet_map_1.csv")
-TASK2 = Task(start_pos = (40, 32), goal_pos = (8, 5), path_to_map = "csv_maps/Samfundet_map_1.csv")
-TASK3 = Task(start_pos = (28, 32), goal_pos = (6, 32), path_to_map = "csv_maps/Samfundet_map_2.csv")
-TASK4 = Task(start_pos = (28, 32), goal_pos = (6, 32), path_to_map = "csv_maps/Samfundet_map_Edgar_full.csv")
-TASK5 = Task(start_pos = (14, 18), goal_pos = (6, 36), end_goal_pos = (6, 7), path_to_map = "csv_maps/Samfundet_map_2.csv")
+# Default limit of frames drawn per second. 0 means no limit, so by default the
+# search runs one step per frame as fast as frames can be drawn
+FPS = 0
 
-TASKS = [TASK0,TASK1,TASK2,TASK3,TASK4,TASK5]
+# Color of grid lines drawn on top of cells
+GRID_COLOR = (100,100,100)
 
-# Goal moves each MOVE_RATE iteration of A*
-MOVE_RATE = 4
+# Font size and colors of the search statistics overlay
+STATS_FONT_SIZE = 14
+STATS_COLOR = (0,0,0)
+STATS_BACKGROUND = (255,255,255)
+
+# If more than this fraction of cells changed in a frame, the whole display is
+# updated at once instead of one rectangle per cell
+FULL_UPDATE_FRACTION = 0.25
 
 class Visualizer(object):
     """
     Pygame visualizer of a map with cells
     """
 
-    def __init__(self, cell_size = 16):
+    def __init__(self, cell_size = 16, connectivity = "4N", steps_per_frame = 1, frame_budget = None, fps = FPS):
         """
         Initializes visualizer
 
         Args:
             cell_size(int): how many pixels a cell in the grid is
+            connectivity(str): connectivity between cells, either "4N" or "8N"
+            steps_per_frame(float): search update steps run between two frames
+                Values below 1 slow the search down, e.g. 0.25 runs one step
+                every fourth frame.
+            frame_budget(float): milliseconds spent on search update steps per
+                frame. If given, it is used instead of steps_per_frame.
+            fps(int): maximum number of frames drawn per second, 0 for no limit
+
+        The speed can be doubled and halved with + and - while running.
         """
 
-        self.map_obj = MapObj(TASK0)
+        self.connectivity = connectivity
+        self.map_obj = MapObj(TASK0, self.connectivity)
         self.curr_task_num = 0
         self.cell_size = cell_size
         self.win_width = self.cell_size * self.map_obj.cols
@@ -47,12 +61,33 @@ class Visualizer(object):
 
         self.tick_counter = 0
 
+        self.steps_per_frame = steps_per_frame
+        self.frame_budget = frame_budget
+        self.fps = fps
+        self.clock = pygame.time.Clock()
+
+        # Update steps owed to the search, carries fractions of steps between frames
+        self.step_credit = 0
+
         self.window = pygame.display.set_mode((self.win_width,self.win_height))
         pygame.display.set_caption("A* Visualizer")
 
         pygame.font.init() 
         self.font = pygame.font.Font(pygame.font.get_default_font(), cell_size)
 
+        # Letters drawn on START and GOAL cells, rendered once
+        self.glyphs = {
+            "START": self.font.render("S",1,(0,0,0)),
+            "GOAL": self.font.render("G",1,(0,0,0))
+        }
+
+        self.grid_overlay = self._render_grid_overlay()
+
+        # Statistics of the current search drawn in the top left corner, toggled with T
+        self.show_stats = False
+        self.stats_font = pygame.font.Font(pygame.font.get_default_font(), STATS_FONT_SIZE)
+        self.stats_rect = None
+
         self._main()
 
     def _main(self):
@@ -68,20 +103,53 @@ class Visualizer(object):
                     pygame.quit()
                     quit()
 
+                if event.type in [pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED]: # Window contents were lost
+                    self.map_obj.mark_all_dirty()
+
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_SPACE: # Start A*
                         if self.map_obj.start_pos and self.map_obj.start_pos:
                             self.map_obj.clean()
-                            self.a_star = AStar(self.map_obj)
+                            self._set_search(AStar(self.map_obj))
                             self.a_star_running = True
                         else:
                             print("Set start and goal positions before running A*")
+                    elif event.key == pygame.K_b: # Start bidirectional A*
+                        if self.map_obj.start_pos and self.map_obj.goal_pos:
+                            self.map_obj.clean()
+                            self._set_search(BidirectionalAStar(self.map_obj))
+                            self.a_star_running = True
+                        else:
+                            print("Set start and goal positions before running bidirectional A*")
+                    elif event.key == pygame.K_j: # Start Jump Point Search
+                        if self.connectivity != "8N":
+                            print("Jump Point Search requires --connectivity 8N")
+                        elif self.map_obj.start_pos and self.map_obj.goal_pos:
+                            self.map_obj.clean()
+                            self._set_search(JumpPointSearch(self.map_obj))
+                            self.a_star_running = True
+                        else:
+                            print("Set start and goal positions before running Jump Point Search")
+                    elif event.key == pygame.K_i: # Start incremental D* Lite
+                        if self.map_obj.start_pos and self.map_obj.goal_pos:
+                            self.map_obj.clean()
+                            self._set_search(DStarLite(self.map_obj))
+                            self.a_star_running = True
+                        else:
+                            print("Set start and goal positions before running D* Lite")
                     elif event.key == pygame.K_r: # Reset map
                         self.map_obj.reset()
+                        self._set_search(None)
                         self.a_star_running = False
                     elif event.key == pygame.K_p: # Take sceenshot
                         os.makedirs("A_star_visualization_images", exist_ok=True)
                         pygame.image.save(self.window, f"A_star_visualization_images/task{self.curr_task_num}.png")
+                    elif event.key in [pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS]: # Speed up search
+                        self._scale_speed(2)
+                    elif event.key in [pygame.K_MINUS, pygame.K_KP_MINUS]: # Slow down search
+                        self._scale_speed(0.5)
+                    elif event.key == pygame.K_t: # Toggle statistics overlay
+                        self.show_stats = not self.show_stats
                     elif event.key == pygame.K_ESCAPE: # Quit application
                         self.running = False
                         pygame.quit()
@@ -92,7 +160,8 @@ class Visualizer(object):
                             # TASK1-5 are the tasks given in assignment
                             self.curr_task_num = int(pygame.key.name(event.key))
                             task = TASKS[self.curr_task_num]
-                            self.map_obj = MapObj(task)
+                            self._set_search(None)
+                            self.map_obj = MapObj(task, self.connectivity)
                             self._recalc_window()
                         except:
                             print("Not a mapped key")
@@ -103,6 +172,7 @@ class Visualizer(object):
                     row, col = self._get_grid_pos(pos)
                     cell = self.map_obj.cells[row][col]
                     self.map_obj.set_cell_state(cell, "STANDARD", self.drawing_weight)
+                    self._resume_incremental_search()
                 
                 # Draws "START" and "GOAL" cells
                 elif pygame.mouse.get_pressed()[1]: # Middle mouse click
@@ -115,6 +185,8 @@ class Visualizer(object):
                         self.map_obj.set_cell_state(cell, "GOAL", cell.weight)
                     elif cell.state in ["START", "GOAL"]:
                         self.map_obj.set_cell_state(cell, "STANDARD", cell.weight)
+                    # A search can not follow a moved start or goal, so it is dropped
+                    self._set_search(None)
                     self.a_star_running = False
                     self.map_obj.clean()
 
@@ -126,19 +198,94 @@ class Visualizer(object):
                     cell = self.map_obj.cells[row][col]
                     # Set cell state to barrier
                     self.map_obj.set_cell_state(cell, "BARRIER", -1)
+                    self._resume_incremental_search()
 
-            # Update map with A* update
-            if self.a_star_running:
-                self.tick_counter += 1
-                if not self.tick_counter % MOVE_RATE:
-                    self.map_obj.move_goal()
-                self.a_star_running = self.a_star.update()
+            # Update map with the update steps of this frame
+            self._step_search()
+
+            # Draw changed cells and update only their part of the display
+            pygame.display.update(self._draw())
+
+            self.clock.tick(self.fps)
+
+    def _step_search(self):
+        """
+        Runs the update steps of the current search for one frame
+
+        Runs steps until self.frame_budget milliseconds have passed if a budget
+        is set, otherwise self.steps_per_frame steps. The search is stopped
+        when it terminates.
+        """
+
+        if not self.a_star_running:
+            self.step_credit = 0
+            return
+
+        if self.frame_budget is not None:
+            deadline = time.perf_counter() + self.frame_budget / 1000
+            while self.a_star_running:
+                self._step()
+                if time.perf_counter() >= deadline: break
+        else:
+            self.step_credit += self.steps_per_frame
+            while self.a_star_running and self.step_credit >= 1:
+                self.step_credit -= 1
+                self._step()
+
+    def _step(self):
+        """
+        Runs one update step of the current search, moving the goal every
+        MOVE_RATE steps
+        """
+
+        self.tick_counter += 1
+        if not self.tick_counter % MOVE_RATE:
+            self.map_obj.move_goal()
+        self.a_star_running = self.a_star.update()
+
+    def _scale_speed(self, factor):
+        """
+        Changes how much of the search is run per frame
+
+        Args:
+            factor(float): factor to multiply frame_budget or steps_per_frame with
+        """
 
-            # Draw window
-            self._draw()
-            
-            # Update display and clock
-            pygame.display.update()
+        if self.frame_budget is not None:
+            self.frame_budget *= factor
+            print(f"Search budget: {self.frame_budget:g} ms per frame")
+        else:
+            self.steps_per_frame *= factor
+            print(f"Search speed: {self.steps_per_frame:g} steps per frame")
+
+    def _set_search(self, search):
+        """
+        Replaces the current search
+
+        Args:
+            search(AStar, BidirectionalAStar, JumpPointSearch or DStarLite): search
+                to step in the main loop, or None to drop the current search
+
+        A replaced D* Lite search is detached from the map so it no longer
+        receives edits.
+        """
+
+        if isinstance(self.a_star, DStarLite):
+            self.a_star.detach()
+        self.a_star = search
+
+    def _resume_incremental_search(self):
+        """
+        Resumes an incremental search after the map has been edited
+
+        D* Lite repairs its previous result when cell weights change, so it is
+        restarted after such edits. A plain A* search is left stopped. Resets
+        and start or goal edits drop the search instead, as it can not repair
+        them.
+        """
+
+        if isinstance(self.a_star, DStarLite) and self.a_star.map_obj is self.map_obj:
+            self.a_star_running = True
 
     def _recalc_window(self):
         """
@@ -151,41 +298,93 @@ class Visualizer(object):
         self.win_height = self.cell_size * self.map_obj.rows
 
         self.window = pygame.display.set_mode((self.win_width,self.win_height))
+        self.grid_overlay = self._render_grid_overlay()
+        self.map_obj.mark_all_dirty()
+
+    def _render_grid_overlay(self):
+        """
+        Renders grid lines to a transparent surface the size of the window
+
+        Return:
+            grid_overlay(pygame.Surface): surface blitted on top of drawn cells
+        """
+
+        grid_overlay = pygame.Surface((self.win_width, self.win_height), pygame.SRCALPHA)
+        for col in range(self.map_obj.cols):
+            x = col * self.cell_size
+            pygame.draw.line(grid_overlay, GRID_COLOR, (x,0), (x,self.win_height))
+        for row in range(self.map_obj.rows):
+            y = row * self.cell_size
+            pygame.draw.line(grid_overlay, GRID_COLOR, (0,y), (self.win_width,y))
+        return grid_overlay
 
     def _draw(self):
         """
-        Draws state of self.map_obj to screen
+        Draws cells of self.map_obj that changed since the last frame
+
+        Return:
+            rects(list[pygame.Rect]): areas of the window that were redrawn
+
+        Each changed cell is filled with its color, gets its glyph if it is a
+        START or GOAL cell, and gets its part of the cached grid overlay.
+        The statistics overlay is drawn on top if it is enabled.
         """
 
-        self.window.fill((255,255,255))
+        # Cells under the previous statistics overlay are uncovered again
+        stats_rect = self.stats_rect
+        if stats_rect is not None:
+            row_max = min(self.map_obj.rows, -(-stats_rect.bottom // self.cell_size))
+            col_max = min(self.map_obj.cols, -(-stats_rect.right // self.cell_size))
+            for row in range(stats_rect.top // self.cell_size, row_max):
+                for col in range(stats_rect.left // self.cell_size, col_max):
+                    self.map_obj.mark_dirty(self.map_obj.cells[row][col])
+            self.stats_rect = None
+
+        dirty_cells = self.map_obj.pop_dirty_cells()
+        rects = []
+        for cell in dirty_cells:
+            x = cell.col * self.cell_size
+            y = cell.row * self.cell_size
+            rect = pygame.Rect(x, y, self.cell_size, self.cell_size)
+            self.window.fill(cell.color, rect)
+            glyph = self.glyphs.get(cell.state)
+            if glyph is not None:
+                self.window.blit(glyph,(x + self.cell_size / 8, y + self.cell_size / 8))
+            self.window.blit(self.grid_overlay, rect, rect)
+            rects.append(rect)
+
+        if self.show_stats and getattr(self.a_star, "stats", None) is not None:
+            self.stats_rect = self._draw_stats(self.a_star.stats)
+            rects.append(self.stats_rect)
+        if stats_rect is not None:
+            rects.append(stats_rect)
+
+        if len(rects) > FULL_UPDATE_FRACTION * self.map_obj.rows * self.map_obj.cols:
+            return [self.window.get_rect()]
+        return rects
+
+
+    def _draw_stats(self, stats):
+        """
+        Draws statistics of a search in the top left corner of the window
 
-        # Draws all cells
-        for j, row_cells in enumerate(self.map_obj.cells):
-            for i, cell in enumerate(row_cells):
-                x = i * self.cell_size
-                y = j * self.cell_size
-                pygame.draw.rect(self.window, cell.color, (x, y, self.cell_size, self.cell_size))
-                if cell.state == "START":
-                    letter = self.font.render("S",1,(0,0,0))
-                    self.window.blit(letter,(x + self.cell_size / 8, y + self.cell_size / 8))
-                elif cell.state == "GOAL":
-                    letter = self.font.render("G",1,(0,0,0))
-                    self.window.blit(letter,(x + self.cell_size / 8, y + self.cell_size / 8))
+        Args:
+            stats(SearchStats): statistics to draw
 
-                
-        # Draws grid on top of cells
-        for col in range(self.map_obj.cols):
-            x1 = x2 = col * self.cell_size
-            y1 = 0
-            y2 = self.win_height
-            pygame.draw.line(self.window, (100,100,100), (x1,y1), (x2,y2))
-            
-        for row in range(self.map_obj.rows):
-            x1 = 0
-            x2 = self.win_width
-            y1 = y2 = row * self.cell_size
-            pygame.draw.line(self.window, (100,100,100), (x1,y1), (x2,y2))
+        Return:
+            rect(pygame.Rect): area covered by the statistics
+        """
 
+        lines = [self.stats_font.render(line, 1, STATS_COLOR) for line in stats.summary()]
+        width = max(line.get_width() for line in lines) + 8
+        height = sum(line.get_height() for line in lines) + 8
+        rect = pygame.Rect(0, 0, width, height).clip(self.window.get_rect())
+        self.window.fill(STATS_BACKGROUND, rect)
+        y = 4
+        for line in lines:
+            self.window.blit(line, (4, y))
+            y += line.get_height()
+        return rect
 
     def _get_grid_pos(self, pos):
         """
@@ -1,6 +1,65 @@
-import copy
 import itertools
 import math
+from collections import deque
+
+
+def count_values(domain):
+    """Get the number of values in a bitmask domain, i.e. the number
+    of set bits.
+    """
+    return bin(domain).count("1")
+
+
+def prune_all_different(domains):
+    """Remove the values that can not be part of any solution of an
+    all-different constraint, from the list of bitmask domains of its
+    variables. Returns the pruned list of domains, or None if the
+    constraint can not be satisfied.
+
+    The following rules are applied until no domain changes:
+    Naked subsets: if the domains of k variables only contain k values
+    between them, here detected as the k domains that are subsets of
+    another domain with k values, those values are removed from all
+    other domains. A variable with a single value is the case k = 1.
+    Hidden singles: if there are exactly as many values left as there
+    are variables, every value must be used, so a value found in only
+    one domain is assigned to that variable.
+    """
+    domains = list(domains)
+    n = len(domains)
+    changed = True
+    while changed:
+        changed = False
+
+        # Naked subsets
+        for subset in set(domains):
+            k = count_values(subset)
+            if k >= n: continue
+            inside = [m for m in range(n) if domains[m] | subset == subset]
+            if len(inside) > k: return None
+            if len(inside) < k: continue
+            for m in range(n):
+                if domains[m] & subset and domains[m] | subset != subset:
+                    domains[m] &= ~subset
+                    changed = True
+
+        # Hidden singles
+        once = 0
+        twice = 0
+        for domain in domains:
+            twice |= once & domain
+            once |= domain
+        values = count_values(once)
+        if values < n: return None
+        if values > n: continue
+        hidden = once & ~twice
+        for m in range(n):
+            single = domains[m] & hidden
+            if not single or single == domains[m]: continue
+            if single & (single - 1): return None # Two values only this variable can take
+            domains[m] = single
+            changed = True
+    return domains
 
 
 class CSP:
@@ -15,6 +74,38 @@ class CSP:
         # the variable pair (i, j)
         self.constraints = {}
 
+        # self.all_different is a list of lists of variables that must
+        # all take different values, and self.all_different_of[i] is a
+        # list of indices into self.all_different of the ones containing
+        # variable i. They are propagated as a whole instead of as
+        # pairwise constraints.
+        self.all_different = []
+        self.all_different_of = {}
+
+        # Bitmask representation used by the solver, built from
+        # self.domains and self.constraints by compile_domains().
+        # self.values is the list of all values in the domains, where
+        # bit k of a domain bitmask stands for self.values[k]. The same
+        # bit is used for a value in every domain.
+        self.values = []
+
+        # self.supports[i][j][k] is a bitmask of the values of j that are
+        # legal together with value self.values[k] of i, and
+        # self.supported_by[i][j][k] is a bitmask of the values of i that
+        # are legal together with value self.values[k] of j
+        self.supports = {}
+        self.supported_by = {}
+
+        # Trail of (variable, previous domain) pairs, one for every domain
+        # change made during the search, so that backtracking can undo
+        # the changes instead of copying the assignment for each branch
+        self.trail = []
+
+        # Wether or not backtrack maintains arc consistency (MAC) by only
+        # propagating from the variable that was just assigned, instead
+        # of running AC-3 on all arcs. Set by backtracking_search().
+        self.mac = True
+
         # Store number of failed backtracks
         self.called_backtracks = 0
         self.failed_backtracks = 0
@@ -26,6 +117,7 @@ class CSP:
         self.variables.append(name)
         self.domains[name] = list(domain)
         self.constraints[name] = {}
+        self.all_different_of[name] = []
 
     def get_all_possible_pairs(self, a, b):
         """Get a list of all possible pairs (as tuples) of the values in
@@ -47,6 +139,20 @@ class CSP:
         """
         return [(i, var) for i in self.constraints[var]]
 
+    def get_all_constraints(self):
+        """Get a list of all constraints in the CSP: the arcs from
+        get_all_arcs(), followed by the indices of the all-different
+        constraints in self.all_different.
+        """
+        return self.get_all_arcs() + list(range(len(self.all_different)))
+
+    def get_all_neighboring_constraints(self, var):
+        """Get a list of all constraints that have to be revised when
+        the domain of variable 'var' changes: the arcs going to 'var',
+        and the indices of the all-different constraints containing it.
+        """
+        return self.get_all_neighboring_arcs(var) + self.all_different_of[var]
+
     def add_constraint_one_way(self, i, j, filter_function):
         """Add a new constraint between variables 'i' and 'j'. The legal
         values are specified by supplying a function 'filter_function',
@@ -67,27 +173,102 @@ class CSP:
     def add_all_different_constraint(self, variables):
         """Add an Alldiff constraint between all of the variables in the
         list 'variables'.
+
+        The constraint is kept as a single global constraint, which is
+        propagated by revise_all_different() instead of by n * (n - 1)
+        pairwise arcs.
+        """
+        index = len(self.all_different)
+        self.all_different.append(list(variables))
+        for var in variables:
+            self.all_different_of[var].append(index)
+
+    def compile_domains(self):
+        """Build the bitmask representation of the domains and
+        constraints used by the solver, and return the initial domains
+        as a dictionary from variable name to bitmask.
+
+        Each domain becomes a single int where bit k is set if value
+        self.values[k] is legal, so copying a domain is an integer copy
+        and pruning is a mask operation. Each constraint (i, j) becomes
+        one bitmask of supported values of j per value of i, and one
+        bitmask of supported values of i per value of j.
         """
-        for (i, j) in self.get_all_possible_pairs(variables, variables):
-            if i != j:
-                self.add_constraint_one_way(i, j, lambda x, y: x != y)
+        bit_of = {}
+        for var in self.variables:
+            for value in self.domains[var]:
+                bit_of.setdefault(value, len(bit_of))
+        self.values = list(bit_of)
+
+        self.supports = {}
+        self.supported_by = {}
+        for i in self.variables:
+            self.supports[i] = {}
+            self.supported_by[i] = {}
+            for j in self.constraints[i]:
+                supports = [0] * len(self.values)
+                supported_by = [0] * len(self.values)
+                for x, y in self.constraints[i][j]:
+                    supports[bit_of[x]] |= 1 << bit_of[y]
+                    supported_by[bit_of[y]] |= 1 << bit_of[x]
+                self.supports[i][j] = supports
+                self.supported_by[i][j] = supported_by
+
+        assignment = {}
+        for var in self.variables:
+            assignment[var] = 0
+            for value in self.domains[var]:
+                assignment[var] |= 1 << bit_of[value]
+        return assignment
+
+    def set_domain(self, assignment, var, domain):
+        """Change the bitmask domain of 'var' in 'assignment', recording
+        the previous domain on the trail so the change can be undone.
+        """
+        self.trail.append((var, assignment[var]))
+        assignment[var] = domain
+
+    def undo(self, assignment, mark):
+        """Undo all domain changes recorded on the trail after it had
+        length 'mark', restoring 'assignment' to its state at that point.
+        """
+        trail = self.trail
+        while len(trail) > mark:
+            var, domain = trail.pop()
+            assignment[var] = domain
+
+    def decode_assignment(self, assignment):
+        """Convert an assignment of bitmask domains back into a
+        dictionary from variable name to list of legal values.
+        """
+        return {var: [value for k, value in enumerate(self.values) if assignment[var] >> k & 1]
+                for var in assignment}
 
-    def backtracking_search(self):
+    def backtracking_search(self, mac=True):
         """This functions starts the CSP solver and returns the found
         solution.
+
+        If 'mac' is True, inference after each assignment starts from
+        the arcs into the assigned variable only (maintaining arc
+        consistency), so its cost depends on the part of the constraint
+        graph that is affected. Otherwise AC-3 is run on all arcs after
+        every assignment.
         """
-        # Make a so-called "deep copy" of the dictionary containing the
-        # domains of the CSP variables. The deep copy is required to
-        # ensure that any changes made to 'assignment' does not have any
-        # side effects elsewhere.
-        assignment = copy.deepcopy(self.domains)
+        self.mac = mac
+
+        # The solver works on its own bitmask domains, so changes made
+        # to 'assignment' does not have any side effects elsewhere.
+        assignment = self.compile_domains()
+        self.trail = []
 
         # Run AC-3 on all constraints in the CSP, to weed out all of the
         # values that are not arc-consistent to begin with
-        self.inference(assignment, self.get_all_arcs())
+        if not self.inference(assignment, self.get_all_constraints()):
+            return False
 
         # Call backtrack with the partial assignment 'assignment'
-        return self.backtrack(assignment)
+        result = self.backtrack(assignment)
+        return self.decode_assignment(result) if result else result
 
     def backtrack(self, assignment):
         """The function 'Backtrack' from the pseudocode in the
@@ -95,47 +276,60 @@ class CSP:
 
         The function is called recursively, with a partial assignment of
         values 'assignment'. 'assignment' is a dictionary that contains
-        a list of all legal values for the variables that have *not* yet
-        been decided, and a list of only a single value for the
-        variables that *have* been decided.
+        a bitmask of all legal values for the variables that have *not*
+        yet been decided, and a bitmask with only a single bit set for
+        the variables that *have* been decided.
 
-        When all of the variables in 'assignment' have lists of length
-        one, i.e. when all variables have been assigned a value, the
+        When all of the variables in 'assignment' have a single legal
+        value, i.e. when all variables have been assigned a value, the
         function should return 'assignment'. Otherwise, the search
         should continue. When the function 'inference' is called to run
-        the AC-3 algorithm, the lists of legal values in 'assignment'
+        the AC-3 algorithm, the bitmasks of legal values in 'assignment'
         should get reduced as AC-3 discovers illegal values.
 
-        IMPORTANT: For every iteration of the for-loop in the
-        pseudocode, you need to make a deep copy of 'assignment' into a
-        new variable before changing it. Every iteration of the for-loop
+        IMPORTANT: Every iteration of the for-loop in the pseudocode
         should have a clean slate and not see any traces of the old
         assignments and inferences that took place in previous
-        iterations of the loop.
+        iterations of the loop. Instead of copying 'assignment' for
+        every iteration, all changes are recorded on self.trail and
+        undone before the next value is tried, so an iteration only
+        costs as much as the domains it changes.
         """
 
         self.called_backtracks += 1
         
-        # Assignment is done when all variables have 1 legal value
+        # Assignment is done when all variables have 1 legal value, and
+        # has failed if any variable has none left
         done = True
         for key in assignment.keys():
-            if len(assignment[key]) != 1:
+            count = count_values(assignment[key])
+            if count == 0:
+                self.failed_backtracks += 1
+                return False
+            if count != 1:
                 done = False
-                break
         if done: return assignment    
 
         # Select variable with MVR
         var = self.select_unassigned_variable(assignment)  
 
         # Values are not extracted using any specific heruistic
-        for value in assignment[var]:
-            assignment_copy = copy.deepcopy(assignment)
-            assignment_copy[var] = value
+        remaining = assignment[var]
+        while remaining:
+            value = remaining & -remaining # Lowest set bit
+            remaining ^= value
+
+            mark = len(self.trail)
+            self.set_domain(assignment, var, value)
             
-            if self.inference(assignment_copy, self.get_all_arcs()):
-                result = self.backtrack(assignment_copy)
+            # All other domains are arc consistent, so with MAC only the
+            # constraints on 'var' can have become inconsistent
+            queue = self.get_all_neighboring_constraints(var) if self.mac else self.get_all_constraints()
+            if self.inference(assignment, queue):
+                result = self.backtrack(assignment)
                 if result:
                     return result
+            self.undo(assignment, mark)
         
         self.failed_backtracks += 1
         return False
@@ -144,26 +338,55 @@ class CSP:
         """The function 'Select-Unassigned-Variable' from the pseudocode
         in the textbook. Should return the name of one of the variables
         in 'assignment' that have not yet been decided, i.e. whose list
-        of legal values has a length greater than one.
+        of legal values does not have a length of one. A variable with
+        no legal values left is returned first, so the caller fails
+        right away.
         """
 
         # Return variable with the least legal values.
         # This is based on the MVR (most-constraining) principle in the book.
-        return min(assignment.keys(), key = lambda v: len(assignment[v]) if len(assignment[v]) > 1 else math.inf)
+        counts = {v: count_values(assignment[v]) for v in assignment}
+        return min(assignment.keys(), key = lambda v: counts[v] if counts[v] != 1 else math.inf)
 
     def inference(self, assignment, queue):
         """The function 'AC-3' from the pseudocode in the textbook.
         'assignment' is the current partial assignment, that contains
-        the lists of legal values for each undecided variable. 'queue'
-        is the initial queue of arcs that should be visited.
+        the bitmasks of legal values for each variable. 'queue' is the
+        initial list of constraints that should be visited, as returned
+        by get_all_constraints(): arcs (i, j), and indices of
+        all-different constraints.
+
+        Constraints already waiting in the queue are not added again,
+        and the search stops as soon as a domain is wiped out.
         """
+        queue = deque(dict.fromkeys(queue)) # Drop duplicates, keep order
+        queued = set(queue)
         while queue:
-            i, j = queue.pop(0)
-            if self.revise(assignment, i, j):
-                if len(assignment[i]) == 0: return False
-                for k, _ in self.get_all_neighboring_arcs(i):
-                    if k == j: continue
-                    queue.append((k, i)) 
+            constraint = queue.popleft()
+            queued.discard(constraint)
+            if isinstance(constraint, tuple):
+                i, j = constraint
+                if not self.revise(assignment, i, j): continue
+                if assignment[i] == 0: return False
+                changed = [i]
+                revised = (j, i)
+            else:
+                changed = self.revise_all_different(assignment, constraint)
+                if changed is None: return False
+                revised = constraint
+
+            # Queue the constraints on the changed variables, except the
+            # revised one, which is already consistent with them
+            for var in changed:
+                for k in self.constraints[var]:
+                    arc = (k, var)
+                    if arc in queued or arc == revised: continue
+                    queued.add(arc)
+                    queue.append(arc)
+                for index in self.all_different_of[var]:
+                    if index in queued or index == revised: continue
+                    queued.add(index)
+                    queue.append(index)
         return True
 
 
@@ -174,22 +397,53 @@ class CSP:
         the lists of legal values for each undecided variable. 'i' and
         'j' specifies the arc that should be visited. If a value is
         found in variable i's domain that doesn't satisfy the constraint
-        between i and j, the value should be deleted from i's list of
-        legal values in 'assignment'.
+        between i and j, the value should be deleted from i's bitmask of
+        legal values in 'assignment'. The change is recorded on the
+        trail, so backtrack can undo it.
         """
 
-        revised = False
-        for x in assignment[i]:
-            # Get all pairs (x,y)
-            pairs = list(self.get_all_possible_pairs(x, assignment[j]))
+        domain_i = assignment[i]
+        domain_j = assignment[j]
+
+        if not domain_j & (domain_j - 1):
+            # At most one value left in j, e.g. when j is assigned, so i
+            # keeps exactly the values that support it
+            domain_i &= self.supported_by[i][j][domain_j.bit_length() - 1] if domain_j else 0
+        else:
+            supports = self.supports[i][j]
+            remaining = domain_i
+            while remaining:
+                x = remaining & -remaining # Lowest set bit
+                remaining ^= x
+
+                # Remove x if none of its supported values are left in j
+                if not supports[x.bit_length() - 1] & domain_j:
+                    domain_i ^= x
+
+        if domain_i == assignment[i]:
+            return False
+        self.set_domain(assignment, i, domain_i)
+        return True
 
-            # Filter constraints with pairs. If no constraints left: revise.
-            if (len(list(filter(lambda pair: pair in pairs, self.constraints[i][j]))) == 0):
-                if x in assignment[i]:
-                    assignment[i].remove(x)
-                revised = True
+    def revise_all_different(self, assignment, index):
+        """Prune the domains of the variables in the all-different
+        constraint self.all_different[index], see prune_all_different().
+        Changes are recorded on the trail, so backtrack can undo them.
 
-        return revised
+        Returns the list of variables whose domains were reduced, or
+        None if the constraint can not be satisfied.
+        """
+        variables = self.all_different[index]
+        domains = prune_all_different([assignment[var] for var in variables])
+        if domains is None:
+            return None
+
+        changed = []
+        for var, domain in zip(variables, domains):
+            if domain != assignment[var]:
+                self.set_domain(assignment, var, domain)
+                changed.append(var)
+        return changed
 
 def create_map_coloring_csp():
     """Instantiate a CSP representing the map coloring problem from the
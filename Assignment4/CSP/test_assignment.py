@@ -0,0 +1,37 @@
+from Assignment import CSP, create_map_coloring_csp
+
+
+def create_unsatisfiable_csp():
+    """Instantiate a CSP without solutions: b and c both only allow 1,
+    but have to be different.
+    """
+    csp = CSP()
+    csp.add_variable('a', [1, 2])
+    csp.add_variable('b', [1])
+    csp.add_variable('c', [1])
+    csp.add_constraint_one_way('b', 'c', lambda x, y: x != y)
+    csp.add_constraint_one_way('c', 'b', lambda x, y: x != y)
+    return csp
+
+
+def test_unsatisfiable_csp_returns_false():
+    for mac in (True, False):
+        assert create_unsatisfiable_csp().backtracking_search(mac=mac) is False
+
+
+def test_wipeout_during_search_returns_false():
+    # Arc consistent to begin with, but a, b and c can not all differ
+    csp = CSP()
+    for var in 'abc':
+        csp.add_variable(var, [1, 2])
+    for i in 'abc':
+        for j in 'abc':
+            if i != j:
+                csp.add_constraint_one_way(i, j, lambda x, y: x != y)
+    assert csp.backtracking_search() is False
+
+
+def test_map_coloring_csp():
+    solution = create_map_coloring_csp().backtracking_search()
+    assert all(len(values) == 1 for values in solution.values())
+    assert solution['SA'] != solution['WA']